@@ -0,0 +1,261 @@
+import arcade
+
+from grid import Grid
+from tetrimino import Tetrimino
+from sound_bank import sound_bank
+
+from constants import (SIDE_MARGIN, BOTTOM_MARGIN, COLORS, DARK_GRAY, BLACK,
+                       WHITE,)
+
+
+class ArcadeGrid(Grid):
+
+    def __init__(self):
+        """Initialize the grid and its persistent render surface.
+
+        The borders and grid outlines never change so they are built once.
+        Every playable cell gets its own sprite that is recolored in place
+        when the cell changes.
+        """
+        self.rect_list = arcade.ShapeElementList()
+        self.outline_list = arcade.ShapeElementList()
+        self.cell_list = arcade.SpriteList()
+        self.cells = {}
+        self.cell_colors = [[0] * 12 for i in range(21)]
+
+        for i in range(21):
+            for j in range(12):
+                x = SIDE_MARGIN + j * 24
+                y = BOTTOM_MARGIN + i * 24
+                if j == 0 or j == 11 or i == 0:
+                    # Color in left, bottom and right borders
+                    self.create_border_rect(x, y)
+                else:
+                    self.create_cell_sprite(i, j, x, y)
+                self.create_grid_rect(x, y)
+
+        super().__init__()
+
+    def refresh(self, rows=None):
+        """Refresh the grid with the latest positions of all the pieces."""
+        cleared = super().refresh(rows)
+        self.update_cells()
+        return cleared
+
+    def restore(self, snapshot):
+        """Put the grid back to a snapshot and redraw every cell."""
+        super().restore(snapshot)
+        self.update_cells()
+
+    def update_cells(self):
+        """Recolor the cells in the rows that changed since the last lock."""
+        for i in self.dirty_rows:
+            if i == 0 or i >= 21:
+                continue
+            row = self._grid[i]
+            colors = self.cell_colors[i]
+            for j in range(1, 11):
+                if colors[j] != row[j]:
+                    colors[j] = row[j]
+                    sprite = self.cells[i, j]
+                    if row[j] > 1:
+                        sprite.color = COLORS[row[j]]
+                        sprite.alpha = 255
+                    else:
+                        sprite.alpha = 0
+        self.dirty_rows.clear()
+
+    def create_cell_sprite(self, i, j, x, y):
+        sprite = arcade.SpriteSolidColor(24, 24, WHITE)
+        sprite.center_x = x
+        sprite.center_y = y
+        sprite.alpha = 0
+        self.cells[i, j] = sprite
+        self.cell_list.append(sprite)
+
+    def create_border_rect(self, x, y):
+        rect = arcade.create_rectangle_filled(
+                        center_x=x,
+                        center_y=y,
+                        width=24,
+                        height=24,
+                        color=DARK_GRAY)
+        self.rect_list.append(rect)
+
+    def create_grid_rect(self, x, y):
+        rect = arcade.create_rectangle_outline(
+                        center_x=x,
+                        center_y=y,
+                        width=24,
+                        height=24,
+                        color=BLACK)
+        self.outline_list.append(rect)
+
+    def draw(self):
+        """Draw the play grid."""
+        self.rect_list.draw()
+        self.cell_list.draw()
+        self.outline_list.draw()
+
+
+class ArcadeTetrimino(Tetrimino):
+
+    def start_hard_drop(self):
+        """Start a hard drop, with sound."""
+        super().start_hard_drop()
+        sound_bank.play('hard_drop')
+
+    def move_left(self):
+        """Move the tetrimino left, with sound."""
+        if super().move_left():
+            sound_bank.play('move')
+            return True
+        return False
+
+    def move_right(self):
+        """Move the tetrimino right, with sound."""
+        if super().move_right():
+            sound_bank.play('move')
+            return True
+        return False
+
+    def move_down(self):
+        """Move the tetrimino down, with fall and touch down sounds."""
+        touched_down = self.lock_down_timer is not None
+        if super().move_down():
+            sound_bank.play('fall')
+            return True
+        if not touched_down:
+            sound_bank.play('touchdown')
+        return False
+
+    def fall(self, rows):
+        """Fall by gravity, with one fall sound for a multi-row fall."""
+        moved = super().fall(rows)
+        if moved and rows > 1:
+            sound_bank.play('fall')
+        return moved
+
+    def rotate_clockwise(self):
+        """Rotate the tetrimino clockwise, with sound."""
+        return self.play_rotate_sound(super().rotate_clockwise())
+
+    def rotate_counter_clockwise(self):
+        """Rotate the tetrimino counter-clockwise, with sound."""
+        return self.play_rotate_sound(super().rotate_counter_clockwise())
+
+    def play_rotate_sound(self, rotated):
+        """Play the rotate or rotate fail sound.
+
+        Arguments:
+            rotated {bool} -- Whether the rotation succeeded
+
+        Returns:
+            bool -- The given rotation result
+        """
+        if rotated:
+            sound_bank.play('rotate')
+        else:
+            sound_bank.play('rotate_fail')
+        return rotated
+
+    def lock_down(self):
+        """Lock the tetrimino to the grid, with sound."""
+        sound_bank.play('lockdown')
+        super().lock_down()
+
+    def draw(self):
+        """Draw the tetrimino and its ghost on the surface below it.
+
+        Only cells below the Skyline are drawn. The geometry for each shape,
+        rotation and number of visible rows is built once and then moved
+        into place, so the whole piece is drawn in a single batch.
+        """
+        distance = self.drop_distance()
+        if distance > 0:
+            self.draw_at(self.y - distance, ghost_geometry)
+        self.draw_at(self.y, piece_geometry)
+
+    def draw_at(self, y, geometry_for):
+        """Draw the cached geometry of the tetrimino in a given row.
+
+        Arguments:
+            y {int} -- Y coordinate to draw the tetrimino at
+            geometry_for {callable} -- piece_geometry or ghost_geometry
+        """
+        visible_rows = min(21 - y, self.state.bbox[3] + 1)
+        if visible_rows <= 0:
+            return
+        geometry = geometry_for(self.shape, self.rotation, visible_rows)
+        geometry.center_x = SIDE_MARGIN + self.x * 24
+        geometry.center_y = BOTTOM_MARGIN + y * 24
+        geometry.draw()
+
+
+# Falling piece geometry keyed by (shape, rotation, visible rows)
+_piece_geometry = {}
+
+
+def piece_geometry(shape, rotation, visible_rows):
+    """Get the cached geometry of a piece, relative to its position.
+
+    Arguments:
+        shape {Shape} -- The piece shape
+        rotation {int} -- Index into the shape's rotation states
+        visible_rows {int} -- Rows of the piece matrix below the Skyline
+
+    Returns:
+        arcade.ShapeElementList -- Filled and outlined cells of the piece
+    """
+    key = (shape, rotation, visible_rows)
+    geometry = _piece_geometry.get(key)
+    if geometry is None:
+        geometry = arcade.ShapeElementList()
+        for dx, dy in shape.rotations[rotation].cells:
+            if dy < visible_rows:
+                geometry.append(arcade.create_rectangle_filled(
+                    center_x=dx * 24,
+                    center_y=dy * 24,
+                    width=24,
+                    height=24,
+                    color=COLORS[shape.color]))
+                geometry.append(arcade.create_rectangle_outline(
+                    center_x=dx * 24,
+                    center_y=dy * 24,
+                    width=24,
+                    height=24,
+                    color=BLACK))
+        _piece_geometry[key] = geometry
+    return geometry
+
+
+# Ghost piece geometry keyed by (shape, rotation, visible rows)
+_ghost_geometry = {}
+
+
+def ghost_geometry(shape, rotation, visible_rows):
+    """Get the cached geometry of a ghost piece, relative to its position.
+
+    Arguments:
+        shape {Shape} -- The piece shape
+        rotation {int} -- Index into the shape's rotation states
+        visible_rows {int} -- Rows of the piece matrix below the Skyline
+
+    Returns:
+        arcade.ShapeElementList -- Cell outlines in the color of the piece
+    """
+    key = (shape, rotation, visible_rows)
+    geometry = _ghost_geometry.get(key)
+    if geometry is None:
+        geometry = arcade.ShapeElementList()
+        for dx, dy in shape.rotations[rotation].cells:
+            if dy < visible_rows:
+                geometry.append(arcade.create_rectangle_outline(
+                    center_x=dx * 24,
+                    center_y=dy * 24,
+                    width=20,
+                    height=20,
+                    color=COLORS[shape.color],
+                    border_width=2))
+        _ghost_geometry[key] = geometry
+    return geometry
@@ -0,0 +1,84 @@
+import random
+from collections import deque
+from itertools import islice
+
+from shape import Shape
+
+SHAPES = list(Shape)
+
+
+class Bag():
+
+    def __init__(self, seed=None):
+        """Initialize a seedable "bag" random generator.
+
+        Every bag holds each of the seven shapes once in a random order, and
+        the pieces are dealt bag after bag. The same seed always deals the
+        same sequence.
+
+        Arguments:
+            seed {int} -- Seed of the generator, random by default
+        """
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.queue = deque()
+        # Bags drawn from the generator so far
+        self.draws = 0
+        # Generator state after the latest draw, shared by every snapshot
+        # taken before the next one
+        self.state = None
+
+    def fill(self, n):
+        """Draw new bags until at least N pieces are queued."""
+        while len(self.queue) < n:
+            self.queue.extend(self.random.sample(SHAPES, len(SHAPES)))
+            self.draws += 1
+            self.state = None
+
+    def peek(self, n=1):
+        """Look at the coming pieces without dealing them.
+
+        Arguments:
+            n {int} -- Number of pieces to look ahead, any number
+
+        Returns:
+            [Shape] -- The next N pieces, in the order they will be dealt
+        """
+        self.fill(n)
+        return list(islice(self.queue, n))
+
+    def next(self):
+        """Deal the next piece.
+
+        Returns:
+            Shape -- The dealt piece
+        """
+        self.fill(1)
+        return self.queue.popleft()
+
+    def snapshot(self):
+        """Copy the position of the bag into immutable values.
+
+        The generator state only changes when a bag is drawn, so it is
+        copied once per bag rather than once per snapshot.
+
+        Returns:
+            (int, tuple, (Shape,)) -- Bags drawn so far, the generator state
+                and the queued shapes
+        """
+        if self.state is None:
+            self.state = self.random.getstate()
+        return self.draws, self.state, tuple(self.queue)
+
+    def restore(self, snapshot):
+        """Put the bag back to a snapshot taken by snapshot().
+
+        Restoring takes the same time however far into the game the
+        snapshot was taken.
+        """
+        draws, state, queue = snapshot
+        if state is not self.state:
+            self.random.setstate(state)
+            self.state = state
+        self.draws = draws
+        self.queue = deque(queue)
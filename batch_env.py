@@ -0,0 +1,268 @@
+import random
+
+import numpy as np
+
+from shape import Shape
+
+SHAPES = list(Shape)
+SHAPE_COLORS = np.array([shape.color for shape in SHAPES], dtype=np.uint8)
+I_INDEX = SHAPES.index(Shape.I)
+
+# Actions
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+ROTATE_CW = 3
+ROTATE_CCW = 4
+SOFT_DROP = 5
+HARD_DROP = 6
+
+LINE_POINTS = np.array([0, 100, 300, 500, 800], dtype=np.int64)
+
+# CELL_Y[s, r] and CELL_X[s, r] hold the offsets of the four minos of shape
+# s in rotation r, so a whole batch of pieces can be placed with one gather.
+CELL_X = np.array([[[x for x, _ in rotation.cells]
+                    for rotation in shape.rotations]
+                   for shape in SHAPES], dtype=np.int64)
+CELL_Y = np.array([[[y for _, y in rotation.cells]
+                    for rotation in shape.rotations]
+                   for shape in SHAPES], dtype=np.int64)
+
+EMPTY_BOARD = np.zeros((24, 12), dtype=np.uint8)
+EMPTY_BOARD[:, 0] = EMPTY_BOARD[:, 11] = 1
+EMPTY_BOARD[0] = 1
+
+
+class BatchEnv():
+
+    def __init__(self, n, seed=None, gravity=True):
+        """Initialize N independent games stepped in lockstep.
+
+        Boards are stored as one (N, 24, 12) uint8 array using the same
+        layout and color indexes as Grid._grid, with the walls set.
+
+        Arguments:
+            n {int} -- Number of boards
+            seed {int} -- Board i uses seed + i for its bag, random by default
+            gravity {bool} -- Move every piece down one row on each step
+        """
+        self.n = n
+        self.gravity = gravity
+        self.index = np.arange(n)
+        self.randoms = [random.Random(None if seed is None else seed + i)
+                        for i in range(n)]
+
+        self.boards = np.empty((n, 24, 12), dtype=np.uint8)
+        self.shape = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+
+        self.bag = np.zeros((n, len(SHAPES)), dtype=np.int64)
+        self.bag_index = np.zeros(n, dtype=np.int64)
+
+        self.level = np.ones(n, dtype=np.int64)
+        self.level_line_counter = np.zeros(n, dtype=np.int64)
+        self.prev_lines_cleared = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.points = np.zeros(n, dtype=np.int64)
+        self.soft_drop_rows = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+
+        self.reset()
+
+    def reset(self, indices=None):
+        """Start new games on the given boards.
+
+        Arguments:
+            indices {[int]} -- Boards to reset, all boards by default
+        """
+        idx = (self.index if indices is None
+               else np.asarray(indices, dtype=np.intp))
+        self.boards[idx] = EMPTY_BOARD
+        self.level[idx] = 1
+        self.level_line_counter[idx] = 0
+        self.prev_lines_cleared[idx] = 0
+        self.lines_cleared[idx] = 0
+        self.points[idx] = 0
+        self.done[idx] = False
+        self.refill_bags(idx)
+        self.spawn(idx)
+
+    def refill_bags(self, idx):
+        """Draw a new 7-bag from each board's own random generator."""
+        for i in idx:
+            shapes = self.randoms[i].sample(SHAPES, len(SHAPES))
+            self.bag[i] = [SHAPES.index(shape) for shape in shapes]
+        self.bag_index[idx] = 0
+
+    @property
+    def next_shape(self):
+        """Index into SHAPES of the next piece on every board."""
+        return self.bag[self.index, self.bag_index]
+
+    def spawn(self, idx):
+        """Bring the next piece into play on the given boards."""
+        shape = self.bag[idx, self.bag_index[idx]]
+        self.shape[idx] = shape
+        self.rotation[idx] = 0
+        self.x[idx] = 4
+        self.y[idx] = np.where(shape == I_INDEX, 18, 19)
+        self.soft_drop_rows[idx] = 0
+
+        self.bag_index[idx] += 1
+        self.refill_bags(idx[self.bag_index[idx] == len(SHAPES)])
+
+        blocked = self.collides(idx, self.rotation[idx], self.x[idx],
+                                self.y[idx])
+        self.done[idx[blocked]] = True
+
+    def collides(self, idx, rotation, x, y):
+        """Check a proposed piece placement on a subset of boards.
+
+        Arguments:
+            idx {ndarray} -- Board indexes
+            rotation {ndarray} -- Proposed rotation per board
+            x {ndarray} -- Proposed X coordinate per board
+            y {ndarray} -- Proposed Y coordinate per board
+
+        Returns:
+            ndarray -- True for every board where a collision is detected
+        """
+        shape = self.shape[idx]
+        ys = y[:, None] + CELL_Y[shape, rotation]
+        xs = x[:, None] + CELL_X[shape, rotation]
+        inside = (xs >= 0) & (xs < 12) & (ys >= 0) & (ys < 24)
+        cells = self.boards[idx[:, None], ys.clip(0, 23), xs.clip(0, 11)]
+        return ((cells != 0) | ~inside).any(axis=1)
+
+    def step(self, actions):
+        """Apply one action to every board and advance all games.
+
+        Boards whose game is over are left untouched until reset.
+
+        Arguments:
+            actions {ndarray} -- One action per board
+
+        Returns:
+            (ndarray, ndarray, ndarray) -- Points scored, lines cleared and
+                game over flag per board
+        """
+        actions = np.asarray(actions)
+        points = self.points.copy()
+        lines = np.zeros(self.n, dtype=np.int64)
+        live = ~self.done
+
+        # Lateral moves and rotations
+        dx = (actions == RIGHT).astype(np.int64) - (actions == LEFT)
+        dr = (actions == ROTATE_CW).astype(np.int64) - (actions == ROTATE_CCW)
+        idx = np.flatnonzero(live & ((dx != 0) | (dr != 0)))
+        if idx.size:
+            x = self.x[idx] + dx[idx]
+            rotation = (self.rotation[idx] + dr[idx]) % 4
+            ok = ~self.collides(idx, rotation, x, self.y[idx])
+            self.x[idx[ok]] = x[ok]
+            self.rotation[idx[ok]] = rotation[ok]
+
+        # Hard drops fall all the way and lock immediately
+        hard = live & (actions == HARD_DROP)
+        dropped = np.zeros(self.n, dtype=np.int64)
+        idx = np.flatnonzero(hard)
+        while idx.size:
+            ok = ~self.collides(idx, self.rotation[idx], self.x[idx],
+                                self.y[idx] - 1)
+            idx = idx[ok]
+            self.y[idx] -= 1
+            dropped[idx] += 1
+
+        # Soft drops and gravity move one row, locking on touch down
+        soft = actions == SOFT_DROP
+        down = live & ~hard & (soft | self.gravity)
+        idx = np.flatnonzero(down)
+        landed = np.zeros(self.n, dtype=bool)
+        if idx.size:
+            ok = ~self.collides(idx, self.rotation[idx], self.x[idx],
+                                self.y[idx] - 1)
+            self.y[idx[ok]] -= 1
+            self.soft_drop_rows[idx[ok & soft[idx]]] += 1
+            landed[idx[~ok]] = True
+
+        idx = np.flatnonzero(hard | landed)
+        if idx.size:
+            lines[idx] = self.lock_down(idx, dropped[idx])
+            self.spawn(idx[~self.done[idx]])
+
+        return self.points - points, lines, self.done.copy()
+
+    def lock_down(self, idx, hard_drop_rows):
+        """Lock the pieces on the given boards, clear lines and score.
+
+        Arguments:
+            idx {ndarray} -- Board indexes
+            hard_drop_rows {ndarray} -- Rows hard dropped per board
+
+        Returns:
+            ndarray -- Number of lines cleared per board
+        """
+        shape = self.shape[idx]
+        rotation = self.rotation[idx]
+        ys = self.y[idx, None] + CELL_Y[shape, rotation]
+        xs = self.x[idx, None] + CELL_X[shape, rotation]
+        self.boards[idx[:, None], ys, xs] = SHAPE_COLORS[shape][:, None]
+        self.done[idx[(ys >= 21).any(axis=1)]] = True
+
+        lines = self.check_for_line_clear(idx)
+        self.calculate_points(idx, lines, hard_drop_rows,
+                              self.soft_drop_rows[idx])
+        return lines
+
+    def check_for_line_clear(self, idx):
+        """Clear filled lines on the given boards in one pass.
+
+        Rows above a cleared line shift down, and empty rows are added at
+        the top of the Matrix.
+
+        Arguments:
+            idx {ndarray} -- Board indexes
+
+        Returns:
+            ndarray -- Number of lines cleared per board
+        """
+        rows = self.boards[idx, 1:]
+        full = (rows[:, :, 1:11] != 0).all(axis=2)
+        full[:, 20:] = False
+        lines = full.sum(axis=1)
+
+        cleared = np.flatnonzero(lines)
+        if cleared.size:
+            # A stable sort on the full flag keeps the remaining rows in
+            # order and moves the cleared rows to the top.
+            order = np.argsort(full[cleared], axis=1, kind='stable')
+            rows = rows[cleared[:, None], order]
+            height = rows.shape[1]
+            top = np.arange(height) >= (height - lines[cleared])[:, None]
+            rows[top] = EMPTY_BOARD[-1]
+            self.boards[idx[cleared], 1:] = rows
+        return lines
+
+    def calculate_points(self, idx, lines, hard_drop_rows, soft_drop_rows):
+        """Update scores on the given boards.
+
+        Arguments:
+            idx {ndarray} -- Board indexes
+            lines {ndarray} -- Lines cleared per board
+            hard_drop_rows {ndarray} -- Rows hard dropped per board
+            soft_drop_rows {ndarray} -- Rows soft dropped per board
+        """
+        points = LINE_POINTS[lines] * self.level[idx]
+        # B2B Bonus 0.5 of Tetris points
+        points += 400 * ((self.prev_lines_cleared[idx] == 4) & (lines == 4))
+        points += 2 * hard_drop_rows + soft_drop_rows
+        self.points[idx] += points
+        self.lines_cleared[idx] += lines
+        self.prev_lines_cleared[idx] = lines
+
+        counter = self.level_line_counter[idx] + lines
+        level_up = counter >= 10
+        self.level[idx] += level_up
+        self.level_line_counter[idx] = counter - 10 * level_up
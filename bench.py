@@ -0,0 +1,310 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from bag import Bag
+from engine import Action, Engine
+from grid import Grid
+from shape import Shape
+from tetrimino import Tetrimino
+
+from constants import MAX_PREVIEW
+
+# Seconds a single timing run should last at least
+MIN_TIME = 0.2
+
+# Timing runs per benchmark, the fastest one is reported
+REPEAT = 5
+
+# Slowdown over the baseline reported as a regression
+THRESHOLD = 0.10
+
+# Fixed seeds played by the headless game benchmark
+GAME_SEEDS = range(20)
+
+# Longest game played by the headless game benchmark, in ticks
+GAME_TICKS = 20000
+
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    """Raised by a benchmark that cannot run in this environment."""
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    A benchmark takes a number of operations, prepares them, runs them and
+    returns the seconds spent running them, so setup is not timed.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def garbage_grid(rows=8, seed=0):
+    """Create a Matrix with random garbage rows, each with one gap."""
+    grid = Grid()
+    rnd = random.Random(seed)
+    for y in range(1, rows + 1):
+        gap = rnd.randrange(1, 11)
+        for x in range(1, 11):
+            if x != gap:
+                grid.fill(x, y, 2)
+    grid.dirty_rows.clear()
+    return grid
+
+
+def line_clear_grid():
+    """Create a Matrix with 4 rows filled except their right column."""
+    grid = garbage_grid()
+    for y in range(1, 5):
+        for x in range(1, 10):
+            grid.fill(x, y, 2)
+    grid.dirty_rows.clear()
+    return grid
+
+
+@benchmark('is_collision_on_move')
+def bench_collision(n):
+    t = Tetrimino(Shape.T, garbage_grid(), 1)
+    t.y = 10
+    moves = [(t.x + dx, t.y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1))]
+    moves = (moves * (n // len(moves) + 1))[:n]
+    collision = t.is_collision_on_move
+    start = time.perf_counter()
+    for x, y in moves:
+        collision(x, y)
+    return time.perf_counter() - start
+
+
+@benchmark('rotate')
+def bench_rotate(n):
+    t = Tetrimino(Shape.T, garbage_grid(), 1)
+    t.y = 10
+    rotate = t.rotate_clockwise
+    start = time.perf_counter()
+    for _ in range(n):
+        rotate()
+    return time.perf_counter() - start
+
+
+@benchmark('lock_down')
+def bench_lock_down(n):
+    # A vertical I piece in the right column clears four lines
+    pieces = []
+    for _ in range(n):
+        t = Tetrimino(Shape.I, line_clear_grid(), 1)
+        t.rotation = 1
+        t.x = 8
+        t.y = 1
+        pieces.append(t)
+    start = time.perf_counter()
+    for t in pieces:
+        t.lock_down()
+    return time.perf_counter() - start
+
+
+@benchmark('clear_lines')
+def bench_clear_lines(n):
+    grids = []
+    for _ in range(n):
+        grid = line_clear_grid()
+        for y in range(1, 5):
+            grid.fill(10, y, 2)
+        grids.append(grid)
+    rows = range(1, 5)
+    start = time.perf_counter()
+    for grid in grids:
+        grid.clear_lines(rows)
+    return time.perf_counter() - start
+
+
+@benchmark('refresh')
+def bench_refresh(n):
+    # The common lock down, where no line is completed
+    grid = garbage_grid()
+    rows = range(9, 13)
+    refresh = grid.refresh
+    start = time.perf_counter()
+    for _ in range(n):
+        refresh(rows)
+    return time.perf_counter() - start
+
+
+@benchmark('update_next_queue')
+def bench_next_queue(n):
+    try:
+        from next_queue import NextQueue
+        next_queue = NextQueue(MAX_PREVIEW)
+        next_queue.update_next_queue([Shape.T])
+    except Exception as e:
+        raise Skip(f'needs Arcade: {e}')
+    bag = Bag(0)
+    previews = []
+    for _ in range(n):
+        bag.next()
+        previews.append(bag.peek(MAX_PREVIEW))
+    update = next_queue.update_next_queue
+    start = time.perf_counter()
+    for shapes in previews:
+        update(shapes)
+    return time.perf_counter() - start
+
+
+def play_game(seed):
+    """Play a headless game with random inputs on a fixed seed."""
+    engine = Engine(seed=seed)
+    inputs = random.Random(seed)
+    engine.process_lock_down()
+    while not engine.game_over and engine.clock.frame < GAME_TICKS:
+        if inputs.random() < 0.3:
+            engine.apply(Action(inputs.randrange(len(Action))))
+        engine.tick()
+    return engine
+
+
+@benchmark('headless_game')
+def bench_headless_game(n):
+    seeds = [GAME_SEEDS[i % len(GAME_SEEDS)] for i in range(n)]
+    start = time.perf_counter()
+    for seed in seeds:
+        play_game(seed)
+    return time.perf_counter() - start
+
+
+def measure(func, min_time=MIN_TIME, repeat=REPEAT):
+    """Time a benchmark.
+
+    Arguments:
+        func {callable} -- The benchmark
+        min_time {float} -- Seconds a single timing run should last at least
+        repeat {int} -- Timing runs, the fastest one is kept
+
+    Returns:
+        dict -- Seconds per operation, operations per second and the
+            number of operations in each run
+    """
+    n = 1
+    while True:
+        elapsed = func(n)
+        if elapsed >= min_time:
+            break
+        n *= 10 if elapsed < min_time / 10 else 2
+    best = min([elapsed] + [func(n) for _ in range(repeat - 1)]) / n
+    return {
+        'seconds_per_op': best,
+        'ops_per_second': 1 / best if best else float('inf'),
+        'ops': n,
+    }
+
+
+def run(names=None, min_time=MIN_TIME, repeat=REPEAT):
+    """Run the benchmarks.
+
+    Arguments:
+        names {[str]} -- Benchmarks to run, all of them by default
+
+    Returns:
+        dict -- Environment and results, ready to be saved as JSON
+    """
+    results = {}
+    skipped = {}
+    for name in names or BENCHMARKS:
+        try:
+            results[name] = measure(BENCHMARKS[name], min_time, repeat)
+        except Skip as e:
+            skipped[name] = str(e)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """Compare results against a baseline.
+
+    Arguments:
+        report {dict} -- Results of run()
+        baseline {dict} -- Results of an earlier run()
+        threshold {float} -- Relative slowdown reported as a regression
+
+    Returns:
+        ({str: float}, [str]) -- Ratio of new to baseline time per operation
+            for each benchmark in both runs, and the regressed benchmarks
+    """
+    ratios = {}
+    regressions = []
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['seconds_per_op'] / old['seconds_per_op']
+        ratios[name] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return f'{seconds * scale:.3f} {unit}'
+    return f'{seconds * 1e9:.1f} ns'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time the hot paths of the game core.')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f'Benchmarks to run: {", ".join(BENCHMARKS)}')
+    parser.add_argument('--output', '-o', help='Write the results as JSON')
+    parser.add_argument('--compare', '-c', metavar='BASELINE',
+                        help='JSON results to check for regressions against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='Relative slowdown that counts as a regression')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME,
+                        help='Seconds each timing run lasts at least')
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help='Timing runs per benchmark')
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f'unknown benchmark {name}')
+
+    report = run(args.names, args.min_time, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    ratios = regressions = ()
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        ratios, regressions = compare(report, baseline, args.threshold)
+
+    for name, result in report['results'].items():
+        line = (f'{name:<22}{format_time(result["seconds_per_op"]):>12}'
+                f'{result["ops_per_second"]:>14,.0f} ops/s')
+        if name in ratios:
+            line += f'  {ratios[name]:6.2f}x'
+            if name in regressions:
+                line += '  REGRESSION'
+        print(line)
+    for name, reason in report['skipped'].items():
+        print(f'{name:<22}skipped, {reason}')
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# Each row of the Matrix is stored as a single integer. Bit PAD + j is set
+# when column j is occupied. The columns outside the playfield (the walls
+# and the padding beyond them) are always set so collisions with the walls
+# need no special casing.
+PAD = 2
+COLUMNS = 12
+ROWS = 24
+
+FULL_ROW = (1 << (COLUMNS + 2 * PAD)) - 1
+EMPTY_ROW = FULL_ROW & ~(((1 << (COLUMNS - 2)) - 1) << (PAD + 1))
+
+
+def row_mask(row):
+    """Build the bitmask for a single row of a shape matrix.
+
+    Arguments:
+        row {[int]} -- A row of a shape matrix
+
+    Returns:
+        int -- Bitmask with bit j set for every occupied column j
+    """
+    mask = 0
+    for j, block in enumerate(row):
+        if block:
+            mask |= 1 << j
+    return mask
+
+
+def build_masks(matrix):
+    """Build the row masks of a shape matrix.
+
+    Rows are listed bottom up to match the Matrix coordinates, and empty
+    rows are left out so a collision test only touches occupied rows.
+
+    Arguments:
+        matrix {[[int]]} -- The shape matrix
+
+    Returns:
+        ((int, int),) -- (row offset, bitmask) pairs
+    """
+    return tuple((i, row_mask(row))
+                 for i, row in enumerate(reversed(matrix)) if any(row))
+
+
+def collides(rows, masks, x, y):
+    """Check if a shape overlaps any occupied cell or wall of a bitboard.
+
+    Arguments:
+        rows {[int]} -- Bitboard rows, bottom row first
+        masks {((int, int),)} -- Row masks of the shape
+        x {int} -- X coordinate of the shape
+        y {int} -- Y coordinate of the shape
+
+    Returns:
+        bool -- True if a collision is detected. False, otherwise.
+    """
+    shift = x + PAD
+    for i, mask in masks:
+        if rows[y + i] & (mask << shift):
+            return True
+    return False
@@ -0,0 +1,362 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import PAD, ROWS, FULL_ROW, EMPTY_ROW, collides
+from engine import Action
+from shape import Shape
+
+# Heuristic weights for aggregate height, lines cleared, holes and
+# bumpiness, tuned for this scoring by a genetic search (Lee, 2013).
+WEIGHTS = (-0.510066, 0.760666, -0.35663, -0.184483)
+
+# Score of a placement that locks out above the Skyline
+LOCK_OUT = -1e9
+
+INTERIOR = FULL_ROW & ~EMPTY_ROW
+COLUMN_BITS = [1 << (PAD + j) for j in range(1, 11)]
+
+# Moves tried from every state while searching for placements
+MOVES = (
+    (Action.ROTATE_CW, 1, 0, 0),
+    (Action.ROTATE_CCW, 3, 0, 0),
+    (Action.MOVE_LEFT, 0, -1, 0),
+    (Action.MOVE_RIGHT, 0, 1, 0),
+    (Action.MOVE_DOWN, 0, 0, -1),
+)
+
+
+class LRUCache():
+
+    def __init__(self, size):
+        """Initialize a transposition table with LRU eviction.
+
+        Arguments:
+            size {int} -- Most entries kept
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+def placements(rows, shape, rotation, x, y):
+    """Find every reachable final placement of a piece with its path.
+
+    Searches breadth first over rotations and moves from the given state, so
+    tucks and spins under overhangs are found as well as plain drops.
+
+    Arguments:
+        rows {(int,)} -- Bitboard rows of the Matrix
+        shape {Shape} -- The piece to place
+        rotation {int} -- Starting rotation
+        x {int} -- Starting X coordinate
+        y {int} -- Starting Y coordinate
+
+    Returns:
+        {(int, int, int): [Action]} -- Actions leading to each resting
+            (rotation, x, y) state
+    """
+    states = shape.rotations
+    start = (rotation, x, y)
+    parents = {start: None}
+    queue = deque([start])
+    final = {}
+
+    while queue:
+        state = queue.popleft()
+        r, x, y = state
+        masks = states[r].masks
+        if collides(rows, masks, x, y - 1):
+            final[state] = None
+        for action, dr, dx, dy in MOVES:
+            new = ((r + dr) % 4, x + dx, y + dy)
+            if new in parents:
+                continue
+            if collides(rows, states[new[0]].masks, new[1], new[2]):
+                continue
+            parents[new] = (state, action)
+            queue.append(new)
+
+    for state in final:
+        path = []
+        node = state
+        while parents[node] is not None:
+            node, action = parents[node]
+            path.append(action)
+        path.reverse()
+        final[state] = path
+    return final
+
+
+def drop_placements(rows, shape):
+    """Find the placements reached by dropping straight down from the top.
+
+    Cheaper than placements() and used for pieces further down the queue.
+
+    Arguments:
+        rows {(int,)} -- Bitboard rows of the Matrix
+        shape {Shape} -- The piece to place
+
+    Yields:
+        (int, int, int) -- Resting (rotation, x, y) states
+    """
+    for r, state in enumerate(shape.rotations):
+        min_x, min_y, max_x, max_y = state.bbox
+        top = ROWS - 1 - max_y
+        for x in range(1 - min_x, 11 - max_x):
+            if collides(rows, state.masks, x, top):
+                continue
+            y = top
+            while not collides(rows, state.masks, x, y - 1):
+                y -= 1
+            yield r, x, y
+
+
+def place(rows, shape, rotation, x, y):
+    """Lock a piece into a copy of a bitboard and clear lines.
+
+    Arguments:
+        rows {(int,)} -- Bitboard rows of the Matrix
+        shape {Shape} -- The piece to lock
+        rotation {int} -- Rotation of the piece
+        x {int} -- X coordinate of the piece
+        y {int} -- Y coordinate of the piece
+
+    Returns:
+        ((int,), int, bool) -- The new rows, lines cleared and whether the
+            piece locked out above the Skyline
+    """
+    new_rows = list(rows)
+    shift = x + PAD
+    locked_out = False
+    for i, mask in shape.rotations[rotation].masks:
+        new_rows[y + i] |= mask << shift
+        if y + i >= 21:
+            locked_out = True
+
+    kept = [row for row in new_rows[1:21] if row != FULL_ROW]
+    lines = 20 - len(kept)
+    if lines:
+        new_rows = ([FULL_ROW] + kept + new_rows[21:]
+                    + [EMPTY_ROW] * lines)
+    return tuple(new_rows), lines, locked_out
+
+
+def evaluate(rows, lines, weights=WEIGHTS):
+    """Score a board with the placement heuristic.
+
+    Heights, holes and bumpiness match features.extract(), computed from
+    the bitboard rows without NumPy since the search scores one board at a
+    time.
+
+    Arguments:
+        rows {(int,)} -- Bitboard rows of the Matrix
+        lines {int} -- Lines cleared by the placement
+        weights {(float,)} -- Weights of height, lines, holes and bumpiness
+
+    Returns:
+        float -- Higher is better
+    """
+    heights = [0] * 10
+    holes = 0
+    covered = 0
+    for i in range(ROWS - 1, 0, -1):
+        row = rows[i] & INTERIOR
+        holes += bin(covered & ~row).count('1')
+        new = row & ~covered
+        if new:
+            for j, bit in enumerate(COLUMN_BITS):
+                if new & bit:
+                    heights[j] = i
+        covered |= row
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    height_weight, lines_weight, holes_weight, bumpiness_weight = weights
+    return (height_weight * sum(heights) + lines_weight * lines
+            + holes_weight * holes + bumpiness_weight * bumpiness)
+
+
+def search(rows, shapes, depth, weights=WEIGHTS, cache=None):
+    """Score the best sequence of placements for the coming pieces.
+
+    Known pieces are searched exhaustively. Past the end of the known
+    queue, the score is averaged over every shape the bag could deal.
+
+    Arguments:
+        rows {(int,)} -- Bitboard rows of the Matrix
+        shapes {(Shape,)} -- Known coming pieces
+        depth {int} -- Number of pieces to look ahead
+        weights {(float,)} -- Heuristic weights
+        cache {LRUCache} -- Transposition table of earlier results
+
+    Returns:
+        float -- Score of the best line of play
+    """
+    key = (rows, shapes, depth)
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    if shapes:
+        best = LOCK_OUT
+        for r, x, y in drop_placements(rows, shapes[0]):
+            new_rows, lines, locked_out = place(rows, shapes[0], r, x, y)
+            if locked_out:
+                continue
+            if depth > 1:
+                # Lines this placement clears count towards the whole line
+                value = weights[1] * lines + search(
+                    new_rows, shapes[1:], depth - 1, weights, cache)
+            else:
+                value = evaluate(new_rows, lines, weights)
+            best = max(best, value)
+    else:
+        best = sum(search(rows, (shape,), depth, weights, cache)
+                   for shape in Shape) / len(Shape)
+
+    if cache is not None:
+        cache.put(key, best)
+    return best
+
+
+# Transposition table of each worker process
+_worker_cache = None
+
+
+def _search_worker(rows, shapes, depth, weights, cache_size):
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = LRUCache(cache_size)
+    return search(rows, shapes, depth, weights, _worker_cache)
+
+
+class Bot():
+
+    def __init__(self, depth=2, weights=WEIGHTS, cache_size=100000,
+                 workers=0):
+        """Initialize a placement search bot.
+
+        Arguments:
+            depth {int} -- Pieces to look ahead, counting the current one.
+                The current and next pieces are known, deeper levels are
+                averaged over every shape.
+            weights {(float,)} -- Heuristic weights
+            cache_size {int} -- Entries in the transposition table
+            workers {int} -- Processes used to search the first level,
+                none by default
+        """
+        self.depth = depth
+        self.weights = weights
+        self.cache_size = cache_size
+        # Search scores, and the chosen path of each position played
+        self.cache = LRUCache(cache_size)
+        self.paths = LRUCache(cache_size)
+        self.executor = ProcessPoolExecutor(workers) if workers else None
+
+    def best_move(self, rows, t, next_shape):
+        """Choose where to place the current piece.
+
+        Arguments:
+            rows {(int,)} -- Bitboard rows of the Matrix
+            t {Tetrimino} -- The piece in play
+            next_shape {Shape} -- The piece shown in the next queue
+
+        Returns:
+            [Action] -- Actions that take the piece to its best placement
+        """
+        moves = placements(rows, t.shape, t.rotation, t.x, t.y)
+        results = []
+        for state, path in moves.items():
+            new_rows, lines, locked_out = place(rows, t.shape, *state)
+            results.append((path, new_rows, lines, locked_out))
+
+        def score(new_rows, lines):
+            if self.depth <= 1:
+                return evaluate(new_rows, lines, self.weights)
+            return self.weights[1] * lines + search(
+                new_rows, (next_shape,), self.depth - 1, self.weights,
+                self.cache)
+
+        if self.executor is not None and self.depth > 1:
+            futures = [None if locked_out else self.executor.submit(
+                           _search_worker, new_rows, (next_shape,),
+                           self.depth - 1, self.weights, self.cache_size)
+                       for path, new_rows, lines, locked_out in results]
+            scores = [LOCK_OUT if f is None
+                      else self.weights[1] * lines + f.result()
+                      for f, (path, new_rows, lines, locked_out)
+                      in zip(futures, results)]
+        else:
+            scores = [LOCK_OUT if locked_out else score(new_rows, lines)
+                      for path, new_rows, lines, locked_out in results]
+
+        best = max(range(len(results)), key=scores.__getitem__, default=None)
+        if best is None:
+            return []
+        return results[best][0]
+
+    def plan(self, engine):
+        """Choose the path for the piece in play, ready to be applied.
+
+        Moves down at the end of the path are left to a hard drop.
+
+        Arguments:
+            engine {Engine} -- The game
+
+        Returns:
+            [Action] -- The actions to apply
+        """
+        key = (tuple(engine.grid.rows), engine.t.key, engine.next_shape)
+        path = self.paths.get(key)
+        if path is None:
+            path = self.best_move(tuple(engine.grid.rows), engine.t,
+                                  engine.next_shape)
+            while path and path[-1] == Action.MOVE_DOWN:
+                path.pop()
+            self.paths.put(key, path)
+        return path
+
+    def play_piece(self, engine):
+        """Drive the piece in play to its placement and lock it.
+
+        Arguments:
+            engine {Engine} -- The game
+        """
+        if engine.t is None:
+            engine.process_lock_down()
+        for action in self.plan(engine):
+            engine.apply(action)
+        engine.drop()
+        engine.lock()
+
+    def play(self, engine, max_pieces=None):
+        """Play a game to the end as fast as possible.
+
+        Arguments:
+            engine {Engine} -- The game
+            max_pieces {int} -- Stop after this many pieces, if given
+        """
+        while not engine.game_over:
+            if max_pieces is not None and engine.pieces >= max_pieces:
+                break
+            self.play_piece(engine)
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -0,0 +1,54 @@
+# Simulation ticks per second
+TICK_RATE = 60
+
+# Most ticks run for a single update, so a long stall does not make the
+# game race to catch up
+MAX_TICKS_PER_UPDATE = 10
+
+
+def ms_to_ticks(ms):
+    """Convert a duration in milliseconds to simulation ticks.
+
+    Arguments:
+        ms {float} -- The duration in milliseconds
+
+    Returns:
+        float -- The duration in ticks
+    """
+    return ms * TICK_RATE / 1000
+
+
+class SimulationClock():
+
+    def __init__(self, rate=TICK_RATE):
+        """Initialize a fixed timestep clock.
+
+        Arguments:
+            rate {int} -- Simulation ticks per second
+        """
+        self.rate = rate
+        self.tick_time = 1 / rate
+        self.frame = 0
+        self.accumulator = 0.0
+
+    def advance(self, delta_time):
+        """Add real time to the clock.
+
+        Arguments:
+            delta_time {float} -- Time since the last update in seconds
+
+        Returns:
+            int -- Number of whole ticks that are now due
+        """
+        self.accumulator += delta_time
+        # Allow for rounding error so a steady 1 / rate stays one tick
+        ticks = int(self.accumulator * self.rate + 1e-6)
+        if ticks > MAX_TICKS_PER_UPDATE:
+            self.accumulator = 0.0
+            return MAX_TICKS_PER_UPDATE
+        self.accumulator = max(0.0, self.accumulator - ticks * self.tick_time)
+        return ticks
+
+    def tick(self):
+        """Step the clock by one tick."""
+        self.frame += 1
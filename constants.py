@@ -1,5 +1,3 @@
-import arcade
-
 SCREEN_WIDTH = 480
 SCREEN_HEIGHT = 600
 SCREEN_TITLE = 'Tetris Clone'
@@ -14,19 +12,28 @@ NEXT_QUEUE_CX = 348
 NEXT_QUEUE_CY = 444
 NEXT_QUEUE_X_OFFSET = 312
 NEXT_QUEUE_Y_OFFSET = 408
+# Height of each half size piece shown after the first one
+NEXT_QUEUE_SLOT_HEIGHT = 36
+# Most pieces the next queue can show
+MAX_PREVIEW = 6
+
+# Cell size of the Matrix and of the half size pieces in the next queue
+CELL_SIZE = 24
+SMALL_CELL_SIZE = 12
 
-# Colors
-WHITE = arcade.color.WHITE
-WHITE_SMOKE = arcade.color.WHITE_SMOKE
-DARK_GRAY = arcade.color.DARK_GRAY
-BLACK = arcade.color.BLACK
-YELLOW = arcade.color.YELLOW
-LIGHT_BLUE = arcade.color.LIGHT_BLUE
-PURPLE = arcade.color.PURPLE
-ORANGE = arcade.color.ORANGE
-DARK_BLUE = arcade.color.DARK_BLUE
-GREEN = arcade.color.GREEN
-RED = arcade.color.RED
+# Colors, as RGB tuples so headless renderers need no Arcade
+WHITE = (255, 255, 255)
+WHITE_SMOKE = (245, 245, 245)
+GRAY = (128, 128, 128)
+DARK_GRAY = (169, 169, 169)
+BLACK = (0, 0, 0)
+YELLOW = (255, 255, 0)
+LIGHT_BLUE = (173, 216, 230)
+PURPLE = (128, 0, 128)
+ORANGE = (255, 165, 0)
+DARK_BLUE = (0, 0, 139)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
 
 COLORS = [None, None, YELLOW, LIGHT_BLUE,
           PURPLE, ORANGE, DARK_BLUE, GREEN, RED]
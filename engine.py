@@ -0,0 +1,292 @@
+import random
+from enum import IntEnum
+
+from bag import Bag
+from clock import SimulationClock
+from events import EventBus, EventType
+from grid import Grid
+from snapshot import Snapshot
+from tetrimino import Tetrimino
+
+
+class Action(IntEnum):
+    MOVE_LEFT = 0
+    MOVE_RIGHT = 1
+    ROTATE_CW = 2
+    ROTATE_CCW = 3
+    SOFT_DROP_START = 4
+    SOFT_DROP_STOP = 5
+    HARD_DROP = 6
+    MOVE_DOWN = 7
+
+
+class Engine():
+
+    def __init__(self, grid=None, tetrimino_class=Tetrimino, seed=None,
+                 recorder=None):
+        """Initialize the game rules without any window, sound or OpenGL.
+
+        Arguments:
+            grid {Grid} -- The Matrix to play on, a new Grid by default
+            tetrimino_class {type} -- Class used to spawn each tetrimino
+            seed {int} -- Non-negative seed for the tetrimino bag, random by
+                default
+            recorder {ReplayRecorder} -- Receives every action and lock down
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.recorder = recorder
+        # Applies held inputs between ticks, set by interactive front ends
+        self.input_handler = None
+        self.clock = SimulationClock()
+        # Telemetry of the game, free until a sink is attached
+        self.events = EventBus(self.clock)
+        self.tetrimino_class = tetrimino_class
+
+        # Game State
+        self.game_over = False
+
+        # Game Stats
+        self.level = 1
+        self.level_line_counter = 0
+        self.prev_lines_cleared = 0
+        self.lines_cleared = 0
+        self.points = 0
+        self.pieces = 0
+        # Rows removed by the latest lock down, bottom first
+        self.cleared_rows = []
+
+        # Game Objects
+        self.grid = grid if grid is not None else Grid()
+        self.grid.events = self.events
+        self.bag = Bag(seed)
+        self.t = None
+
+    @property
+    def next_shape(self):
+        """The shape that will be in play after the current tetrimino."""
+        return self.bag.peek()[0]
+
+    def preview(self, n):
+        """The shapes that will be in play after the current tetrimino.
+
+        Arguments:
+            n {int} -- Number of shapes to look ahead
+
+        Returns:
+            [Shape] -- The next N shapes, in the order they will be dealt
+        """
+        return self.bag.peek(n)
+
+    def update(self, delta_time):
+        """Advance the game by real time, one fixed tick at a time.
+
+        Arguments:
+            delta_time {float} -- Time since the last update in seconds
+        """
+        for _ in range(self.clock.advance(delta_time)):
+            if self.game_over:
+                break
+            self.tick()
+
+    def tick(self):
+        """Advance the game by a single simulation tick.
+
+        Headless runs can call this directly to play at full speed.
+        """
+        if self.input_handler is not None:
+            # Repeats are applied between ticks, like key presses, so they
+            # are recorded and replayed on the same tick
+            self.input_handler.on_tick()
+        self.clock.tick()
+        self.process_lock_down()
+        self.t.on_tick()
+
+    def apply(self, action):
+        """Apply a player action to the tetrimino in play.
+
+        Arguments:
+            action {Action} -- The action to apply
+        """
+        t = self.t
+        if t is None:
+            return
+        if self.recorder is not None:
+            self.recorder.on_action(self.clock.frame, action)
+
+        if action == Action.MOVE_LEFT:
+            if not t.hard_drop:
+                t.move_left()
+        elif action == Action.MOVE_RIGHT:
+            if not t.hard_drop:
+                t.move_right()
+        elif action == Action.ROTATE_CW:
+            t.rotate_clockwise()
+        elif action == Action.ROTATE_CCW:
+            t.rotate_counter_clockwise()
+        elif action == Action.SOFT_DROP_START:
+            t.start_soft_drop()
+        elif action == Action.SOFT_DROP_STOP:
+            t.stop_soft_drop()
+        elif action == Action.HARD_DROP:
+            t.start_hard_drop()
+        elif action == Action.MOVE_DOWN:
+            t.move_down()
+
+    def process_lock_down(self):
+        """Score a lock down and bring the next tetrimino into play.
+
+        Returns:
+            bool -- True if a lock down was processed. False, otherwise.
+        """
+        if not self.grid.refreshed:
+            return False
+
+        # If grid is refreshed and a tetrimino exists, a lock down
+        # occurred. Calculate any points accrued or if the tetrimino
+        # was locked out.
+        if self.t:
+            self.cleared_rows = self.grid.cleared_rows
+            self.calculate_points(len(self.cleared_rows),
+                                  self.t.hard_drop_lock,
+                                  self.t.soft_drop_lock)
+            self.grid.lines_cleared = 0
+            self.pieces += 1
+            if self.recorder is not None:
+                self.recorder.on_lock(self.clock.frame)
+
+            if self.t.locked_out:
+                self.end_game()
+
+        self.spawn()
+        return True
+
+    def spawn(self):
+        """Bring the next tetrimino into play.
+
+        Returns:
+            Tetrimino -- The tetrimino now in play
+        """
+        self.t = self.get_next_tetrimino()
+        if self.events:
+            self.events.emit(EventType.SPAWN, self.t.shape)
+
+        if self.t.blocked_out:
+            self.end_game()
+
+        self.grid.refreshed = False
+        return self.t
+
+    def end_game(self):
+        """End the game once, when a tetrimino is locked or blocked out."""
+        if self.game_over:
+            return
+        self.game_over = True
+        if self.events:
+            self.events.emit(EventType.GAME_OVER, self.points,
+                             self.lines_cleared, self.level, self.pieces)
+
+    def drop(self):
+        """Hard drop the tetrimino straight onto the surface.
+
+        Returns:
+            int -- Number of rows the tetrimino dropped
+        """
+        self.t.start_hard_drop()
+        return self.t.hard_drop_lock
+
+    def lock(self):
+        """Lock the tetrimino in place and spawn the next one."""
+        self.t.lock_down()
+        self.process_lock_down()
+
+    def snapshot(self):
+        """Copy the whole game into an immutable Snapshot.
+
+        Returns:
+            Snapshot -- The game, without any objects shared with it
+        """
+        return Snapshot(
+            self.grid.snapshot(),
+            None if self.t is None else self.t.snapshot(),
+            self.bag.snapshot(),
+            (self.level, self.level_line_counter, self.prev_lines_cleared,
+             self.lines_cleared, self.points, self.pieces,
+             tuple(self.cleared_rows), self.game_over),
+            self.clock.frame)
+
+    def restore(self, snapshot):
+        """Put the game back to a snapshot taken by snapshot().
+
+        Arguments:
+            snapshot {Snapshot} -- The snapshot to restore
+        """
+        self.grid.restore(snapshot.grid)
+        self.bag.restore(snapshot.bag)
+        (self.level, self.level_line_counter, self.prev_lines_cleared,
+         self.lines_cleared, self.points, self.pieces, cleared_rows,
+         self.game_over) = snapshot.stats
+        self.cleared_rows = list(cleared_rows)
+        self.clock.frame = snapshot.frame
+        self.clock.accumulator = 0.0
+        self.t = None
+        if snapshot.piece is not None:
+            self.t = self.tetrimino_class(snapshot.piece[0], self.grid,
+                                          self.level)
+            self.t.restore(snapshot.piece)
+
+    def clone(self):
+        """Copy the game into a new headless engine, for rollouts.
+
+        Returns:
+            Engine -- An independent game in the same state, without a
+                recorder, input handler or Arcade objects
+        """
+        engine = Engine(seed=self.seed)
+        engine.restore(self.snapshot())
+        return engine
+
+    def get_next_tetrimino(self):
+        """Retrieve the next random tetrimino using the "bag" system."""
+        return self.tetrimino_class(self.bag.next(), self.grid, self.level)
+
+    def calculate_points(self, lines, hard_drop_rows, soft_drop_rows):
+        """Update score with given number of lines cleared.
+
+        Arguments:
+            lines {int} -- Number of lines cleared in latest grid refresh
+            hard_drop_rows {int} -- Number of rows the tetrimino hard dropped
+            soft_drop_rows {int} -- Number of rows the tetrimino soft dropped
+        """
+        self.lines_cleared += lines
+        points = self.points
+        if lines == 1:
+            self.points += 100 * self.level
+        elif lines == 2:
+            self.points += 300 * self.level
+        elif lines == 3:
+            self.points += 500 * self.level
+        elif lines == 4:
+            self.points += 800 * self.level
+
+        self.level_line_counter += lines
+        if self.level_line_counter >= 10:
+            self.level += 1
+            self.level_line_counter -= 10
+            if self.events:
+                self.events.emit(EventType.LEVEL_UP, self.level)
+
+        if self.prev_lines_cleared == 4 and lines == 4:
+            self.points += 400  # B2B Bonus 0.5 of Tetris points
+
+        if hard_drop_rows > 0:
+            self.points += (hard_drop_rows * 2)
+
+        if soft_drop_rows > 0:
+            self.points += soft_drop_rows
+
+        self.prev_lines_cleared = lines
+        if self.events and self.points != points:
+            self.events.emit(EventType.SCORE, self.points,
+                             self.points - points)
@@ -0,0 +1,282 @@
+import json
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from enum import IntEnum
+
+from varint import read_varint, write_varint
+from shape import Shape
+
+SHAPES = list(Shape)
+
+# Binary layout: a stream of chunks like replays, each one a varint byte
+# length followed by its payload. The first chunk is the header (MAGIC,
+# VERSION). Every later chunk holds a batch of events, each encoded as
+# varints of its type, frame and microseconds since the bus started, then
+# its values in the order of FIELDS. Shapes are stored as their index in
+# SHAPES, tuples as their length followed by their items and other integers
+# zigzag encoded, since a piece can sit left of the Matrix.
+MAGIC = b'TTEV'
+VERSION = 1
+
+# Most events written in one batch, and the longest an event waits for one
+BATCH_EVENTS = 1024
+FLUSH_INTERVAL = 0.5
+
+
+class EventType(IntEnum):
+    SPAWN = 0
+    MOVE = 1
+    ROTATE = 2
+    LOCK = 3
+    LINE_CLEAR = 4
+    LEVEL_UP = 5
+    SCORE = 6
+    GAME_OVER = 7
+
+
+# Names of the values carried by each type of event
+FIELDS = {
+    EventType.SPAWN: ('shape',),
+    EventType.MOVE: ('x', 'y'),
+    EventType.ROTATE: ('rotation',),
+    EventType.LOCK: ('shape', 'x', 'y', 'rotation', 'frames', 'hard_drop',
+                     'soft_drop'),
+    EventType.LINE_CLEAR: ('rows',),
+    EventType.LEVEL_UP: ('level',),
+    EventType.SCORE: ('points', 'gained'),
+    EventType.GAME_OVER: ('points', 'lines', 'level', 'pieces'),
+}
+
+# A single event.
+#   type -- The EventType
+#   frame -- Simulation tick the event happened on
+#   time -- Seconds since the bus was created
+#   values -- The values named by FIELDS[type]
+Event = namedtuple('Event', ['type', 'frame', 'time', 'values'])
+
+
+class EventBus():
+
+    def __init__(self, clock=None):
+        """Initialize a bus that hands game events to its sinks.
+
+        A bus is true only while a sink is attached, so emitters guard with
+        `if self.events:` and skip building events nobody receives.
+
+        Arguments:
+            clock {SimulationClock} -- Clock events are stamped with, if any
+        """
+        self.clock = clock
+        self.sinks = []
+        self.start = time.perf_counter()
+
+    def __bool__(self):
+        return bool(self.sinks)
+
+    def attach(self, sink):
+        """Send every later event to a sink.
+
+        Arguments:
+            sink -- Any object with write(event) and close() methods
+        """
+        self.sinks.append(sink)
+
+    def detach(self, sink):
+        self.sinks.remove(sink)
+
+    def emit(self, type, *values):
+        """Stamp an event and hand it to every sink.
+
+        Arguments:
+            type {EventType} -- The type of event
+            values -- The values named by FIELDS[type]
+        """
+        if not self.sinks:
+            return
+        event = Event(type, 0 if self.clock is None else self.clock.frame,
+                      time.perf_counter() - self.start, values)
+        for sink in self.sinks:
+            sink.write(event)
+
+    def close(self):
+        """Detach and close every sink."""
+        sinks, self.sinks = self.sinks, []
+        for sink in sinks:
+            sink.close()
+
+
+def to_dict(event):
+    """Convert an event to a JSON serializable dict.
+
+    Arguments:
+        event {Event} -- The event
+
+    Returns:
+        dict -- The type name, frame, time and every named value
+    """
+    data = {'type': event.type.name.lower(), 'frame': event.frame,
+            'time': round(event.time, 6)}
+    for name, value in zip(FIELDS[event.type], event.values):
+        if isinstance(value, Shape):
+            value = value.name
+        elif isinstance(value, tuple):
+            value = list(value)
+        data[name] = value
+    return data
+
+
+def encode_event(buffer, event):
+    """Append the binary encoding of an event to a bytearray."""
+    write_varint(buffer, event.type)
+    write_varint(buffer, event.frame)
+    write_varint(buffer, round(event.time * 1e6))
+    for value in event.values:
+        if isinstance(value, Shape):
+            write_varint(buffer, SHAPES.index(value))
+        elif isinstance(value, tuple):
+            write_varint(buffer, len(value))
+            for item in value:
+                write_varint(buffer, item)
+        else:
+            write_varint(buffer, value << 1 if value >= 0 else ~value << 1 | 1)
+
+
+def read_events(path):
+    """Read a binary event log written by a FileSink.
+
+    Arguments:
+        path {str} -- The event log
+
+    Returns:
+        [Event] -- Every event in the log, in the order they were emitted
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    length, pos = read_varint(data, 0)
+    header = data[pos:pos + length]
+    pos += length
+    if header[:4] != MAGIC:
+        raise ValueError(f'{path} is not an event log')
+    if header[4] != VERSION:
+        raise ValueError(f'Unsupported event log version {header[4]}')
+
+    events = []
+    while pos < len(data):
+        length, pos = read_varint(data, pos)
+        end = pos + length
+        while pos < end:
+            code, pos = read_varint(data, pos)
+            frame, pos = read_varint(data, pos)
+            micros, pos = read_varint(data, pos)
+            type = EventType(code)
+            values = []
+            for name in FIELDS[type]:
+                value, pos = read_varint(data, pos)
+                if name == 'shape':
+                    value = SHAPES[value]
+                elif name == 'rows':
+                    items = []
+                    for _ in range(value):
+                        item, pos = read_varint(data, pos)
+                        items.append(item)
+                    value = tuple(items)
+                else:
+                    value = value >> 1 if value & 1 == 0 else ~(value >> 1)
+                values.append(value)
+            events.append(Event(type, frame, micros / 1e6, tuple(values)))
+    return events
+
+
+class MemorySink():
+
+    def __init__(self, limit=None):
+        """Keep the most recent events in memory.
+
+        Arguments:
+            limit {int} -- Most events kept, all of them by default
+        """
+        self.events = deque(maxlen=limit)
+
+    def write(self, event):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+class FileSink():
+
+    def __init__(self, path, binary=None, batch_events=BATCH_EVENTS,
+                 interval=FLUSH_INTERVAL):
+        """Stream events to a file from a background thread.
+
+        write() only queues the event, so the game loop never waits on the
+        disk. The thread encodes and writes events in batches.
+
+        Arguments:
+            path {str} -- The file to write
+            binary {bool} -- Write the compact binary format instead of JSON
+                lines, by default for a .bin file
+            batch_events {int} -- Most events written in one batch
+            interval {float} -- Longest time in seconds an event is held
+                before its batch is written
+        """
+        self.path = path
+        self.binary = path.endswith('.bin') if binary is None else binary
+        self.batch_events = batch_events
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.file = open(path, 'wb' if self.binary else 'w')
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, event):
+        self.queue.put(event)
+
+    def run(self):
+        if self.binary:
+            self.write_chunk(MAGIC + bytes([VERSION]))
+        done = False
+        while not done:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while batch[-1] is not None and len(batch) < self.batch_events:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                # Closed, write what is left and stop
+                batch.pop()
+                done = True
+            if batch:
+                self.write_batch(batch)
+        self.file.close()
+
+    def write_batch(self, batch):
+        if self.binary:
+            payload = bytearray()
+            for event in batch:
+                encode_event(payload, event)
+            self.write_chunk(payload)
+        else:
+            self.file.write(''.join(json.dumps(to_dict(event)) + '\n'
+                                    for event in batch))
+        self.file.flush()
+
+    def write_chunk(self, payload):
+        length = bytearray()
+        write_varint(length, len(payload))
+        self.file.write(bytes(length) + bytes(payload))
+
+    def close(self):
+        """Write every queued event and close the file."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
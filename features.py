@@ -0,0 +1,138 @@
+import numpy as np
+
+from bitboard import PAD, ROWS, COLUMNS
+from grid import Grid
+from shape import Shape
+
+SHAPES = list(Shape)
+
+# Rows above the floor and playable columns of a board
+HEIGHT = ROWS - 1
+WIDTH = COLUMNS - 2
+
+# Bit of each playable column in a bitboard row
+COLUMN_SHIFTS = np.arange(1, COLUMNS - 1) + PAD
+
+# Lowest and highest cell offsets of every shape and rotation, indexed
+# [shape, rotation] with shapes in the order of SHAPES
+MIN_Y = np.array([[rotation.bbox[1] for rotation in shape.rotations]
+                  for shape in SHAPES], dtype=np.int64)
+MAX_Y = np.array([[rotation.bbox[3] for rotation in shape.rotations]
+                  for shape in SHAPES], dtype=np.int64)
+
+FEATURES = ('heights', 'aggregate_height', 'max_height', 'holes',
+            'bumpiness', 'wells', 'row_transitions', 'column_transitions')
+
+
+def occupancy(boards):
+    """Convert boards to occupied cells above the floor.
+
+    Arguments:
+        boards -- A Grid, a sequence of Grids, a (24, 12) array of color
+            indexes laid out like Grid._grid, or an (N, 24, 12) batch of them
+            such as BatchEnv.boards
+
+    Returns:
+        ndarray -- (N, 23, 10) bool array, row 0 being the lowest row above
+            the floor
+    """
+    if isinstance(boards, Grid):
+        boards = [boards]
+    if isinstance(boards, (list, tuple)) and not boards:
+        return np.zeros((0, HEIGHT, WIDTH), dtype=bool)
+    if isinstance(boards, (list, tuple)) and isinstance(boards[0], Grid):
+        # Unpack the bitboard rows instead of walking the cells
+        rows = np.array([grid.rows for grid in boards], dtype=np.int64)
+        return (rows[:, 1:, None] >> COLUMN_SHIFTS & 1).astype(bool)
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[None]
+    return boards[:, 1:, 1:COLUMNS - 1] != 0
+
+
+def column_heights(occupied):
+    """Height of the highest occupied cell of each column, 0 if empty.
+
+    Arguments:
+        occupied {ndarray} -- (N, 23, 10) result of occupancy()
+
+    Returns:
+        ndarray -- (N, 10) heights
+    """
+    top = occupied[:, ::-1].argmax(axis=1)
+    return np.where(occupied.any(axis=1), HEIGHT - top, 0)
+
+
+def extract(boards):
+    """Compute the standard board features.
+
+    bot.evaluate() scores heights, holes and bumpiness with the same
+    definitions straight from the bitboard rows. It scores one board at a
+    time in the search, where NumPy call overhead would dominate, so the
+    tests check that both agree instead.
+
+    Holes are empty cells below the top of their column. Wells count the
+    depth of every column lower than both neighbours, with the walls as full
+    columns. Transitions count changes between occupied and empty cells
+    along each row of the Matrix and down each column, the walls and floor
+    counting as occupied.
+
+    Arguments:
+        boards -- Anything accepted by occupancy()
+
+    Returns:
+        {str: ndarray} -- Every name in FEATURES, each with one value per
+            board. Heights are an (N, 10) array.
+    """
+    occupied = occupancy(boards)
+    n = len(occupied)
+    heights = column_heights(occupied)
+
+    holes = heights.sum(axis=1) - occupied.sum(axis=(1, 2))
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    walls = np.full((n, 1), HEIGHT)
+    padded = np.concatenate([walls, heights, walls], axis=1)
+    neighbours = np.minimum(padded[:, :-2], padded[:, 2:])
+    wells = np.clip(neighbours - heights, 0, None).sum(axis=1)
+
+    matrix = occupied[:, :20]
+    full = np.ones((n, matrix.shape[1], 1), dtype=bool)
+    rows = np.concatenate([full, matrix, full], axis=2)
+    row_transitions = (rows[:, :, 1:] != rows[:, :, :-1]).sum(axis=(1, 2))
+
+    floor = np.ones((n, 1, WIDTH), dtype=bool)
+    columns = np.concatenate([floor, occupied], axis=1)
+    column_transitions = (columns[:, 1:] != columns[:, :-1]).sum(axis=(1, 2))
+
+    return {
+        'heights': heights,
+        'aggregate_height': heights.sum(axis=1),
+        'max_height': heights.max(axis=1),
+        'holes': holes,
+        'bumpiness': bumpiness,
+        'wells': wells,
+        'row_transitions': row_transitions,
+        'column_transitions': column_transitions,
+    }
+
+
+def landing_height(shapes, rotations, ys):
+    """Height of the middle of pieces where they lock.
+
+    Arguments:
+        shapes -- Shape of each piece, as Shapes or indexes into SHAPES
+        rotations -- Rotation of each piece
+        ys -- Y coordinate of each piece where it locks
+
+    Returns:
+        ndarray -- Landing height of each piece, 1 for a flat piece on
+            the floor
+    """
+    if isinstance(shapes, Shape):
+        shapes = [shapes]
+    shapes = np.array([SHAPES.index(s) if isinstance(s, Shape) else s
+                       for s in np.atleast_1d(shapes)], dtype=np.int64)
+    rotations = np.atleast_1d(rotations)
+    ys = np.atleast_1d(ys)
+    return ys + (MIN_Y[shapes, rotations] + MAX_Y[shapes, rotations]) / 2
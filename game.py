@@ -1,47 +1,101 @@
+import argparse
 import arcade
 import timeit
-import random
 
-from grid import Grid
-from shape import Shape
-from tetrimino import Tetrimino
+from engine import Action, Engine
+from events import FileSink
+from arcade_ui import ArcadeGrid, ArcadeTetrimino
+from bot import Bot
+from hud import Hud
+from input_handler import ARR, DAS, InputHandler
 from next_queue import NextQueue
+from profiler import profiler
+from replay import ReplayPlayer, ReplayRecorder
+from snapshot import UndoStack
+from sound_bank import sound_bank
 
 from constants import (SCALING, SCREEN_HEIGHT, SCREEN_WIDTH, SCREEN_TITLE,
-                       NEXT_QUEUE_CX, NEXT_QUEUE_CY,)
+                       GRAY,)
+
+# Frames between refreshes of the profiler overlay
+PROFILE_REFRESH = 30
+
+# Player actions for each key, applied when the key is pressed or released
+KEY_PRESS_ACTIONS = {
+    arcade.key.DOWN: Action.SOFT_DROP_START,
+    arcade.key.UP: Action.ROTATE_CW,
+    arcade.key.X: Action.ROTATE_CW,
+    arcade.key.LCTRL: Action.ROTATE_CCW,
+    arcade.key.Z: Action.ROTATE_CCW,
+    arcade.key.SPACE: Action.HARD_DROP,
+}
+KEY_RELEASE_ACTIONS = {
+    arcade.key.DOWN: Action.SOFT_DROP_STOP,
+}
+# Lateral moves, applied on key down and auto-repeated while held
+KEY_MOVE_ACTIONS = {
+    arcade.key.LEFT: Action.MOVE_LEFT,
+    arcade.key.RIGHT: Action.MOVE_RIGHT,
+}
 
 
 class Tetris(arcade.Window):
 
-    def __init__(self, width, height, title):
-        """Initialize the game."""
+    def __init__(self, width, height, title, record=None, replay=None,
+                 bot=None, profile=None, preview=1, das=DAS, arr=ARR,
+                 events=None):
+        """Initialize the game.
+
+        Arguments:
+            width {int} -- Window width
+            height {int} -- Window height
+            title {str} -- Window title
+            record {str} -- Stream a replay of the game to this file
+            replay {str} -- Play back this replay file instead of playing
+            bot {Bot} -- Let a bot play instead of the keyboard
+            profile {str} -- Profile every frame and write the timings to
+                this .csv or .json file on exit
+            preview {int} -- Number of pieces shown in the next queue
+            das {float} -- Delayed Auto Shift of held moves in ms
+            arr {float} -- Auto Repeat Rate of held moves in ms
+            events {str} -- Stream game events to this JSON lines file, or
+                binary .bin file
+        """
         super().__init__(width, height, title)
-        arcade.set_background_color(arcade.color.GRAY)
+        arcade.set_background_color(GRAY)
 
-        # Sounds
-        self.single_clear_sound = arcade.load_sound('sounds/ClearSingle.ogg')
-        self.double_clear_sound = arcade.load_sound('sounds/ClearDouble.ogg')
-        self.triple_clear_sound = arcade.load_sound('sounds/ClearTriple.ogg')
-        self.tetris_clear_sound = arcade.load_sound('sounds/ClearQuad.ogg')
-        self.level_up_sound = arcade.load_sound('sounds/LevelUp.ogg')
+        # Sounds, only played once there is a window
+        sound_bank.enabled = True
+        sound_bank.preload(background=True)
 
         # Game State
         self.paused = False
-        self.game_over = False
-
-        # Game Stats
-        self.level = 1
-        self.level_line_counter = 0
-        self.prev_lines_cleared = 0
-        self.lines_cleared = 0
-        self.points = 0
 
         # Game Objects
-        self.grid = Grid()
-        self.tetrimino_bag = random.sample(list(Shape), len(Shape))
-        self.t_index = 0
-        self.t = None
-        self.next_queue = NextQueue()
+        self.bot = bot
+        self.bot_piece = None
+        self.replay = None
+        self.recorder = None
+        if replay:
+            self.replay = ReplayPlayer(replay, ArcadeGrid(), ArcadeTetrimino)
+            self.engine = self.replay.engine
+        else:
+            self.engine = Engine(ArcadeGrid(), ArcadeTetrimino)
+            if record:
+                self.recorder = ReplayRecorder(record, self.engine.seed)
+                self.engine.recorder = self.recorder
+        # Snapshots taken as each piece spawns, when no replay is involved
+        self.undo_stack = None
+        self.undo_piece = None
+        if not (record or replay or bot):
+            self.undo_stack = UndoStack()
+        if events:
+            self.engine.events.attach(FileSink(events))
+        self.input_handler = InputHandler(self.engine, das, arr)
+        if not self.replay:
+            self.engine.input_handler = self.input_handler
+        self.next_queue = NextQueue(preview)
+        self.hud = Hud(self.next_queue.extra_height)
 
         # Diagnostics
         self.diagnostics = False
@@ -49,6 +103,26 @@ class Tetris(arcade.Window):
         self.frame_count = 0
         self.fps_start_timer = None
         self.fps = None
+        self.profile = profile
+        self.watch_sections()
+        if profile:
+            profiler.enable()
+
+    def watch_sections(self):
+        """Register the stages of each frame with the profiler."""
+        profiler.watch(Tetris, 'on_key_press', 'input')
+        profiler.watch(Tetris, 'on_key_release', 'input')
+        profiler.watch(Tetris, 'on_update', 'update')
+        profiler.watch(Engine, 'tick', 'tick')
+        profiler.watch(ArcadeTetrimino, 'on_tick', 'on_tick')
+        profiler.watch(ArcadeTetrimino, 'lock_down', 'lock_down')
+        profiler.watch(ArcadeGrid, 'clear_lines', 'line_clear')
+        profiler.watch(ArcadeGrid, 'refresh', 'refresh')
+        profiler.watch(Tetris, 'on_draw', 'draw')
+        profiler.watch(ArcadeGrid, 'draw', 'draw_grid')
+        profiler.watch(ArcadeTetrimino, 'draw', 'draw_piece')
+        profiler.watch(NextQueue, 'draw', 'draw_next_queue')
+        profiler.watch(Hud, 'draw', 'draw_hud')
 
     def on_key_press(self, symbol: int, modifiers: int):
         """Handle user keyboard input.
@@ -57,6 +131,7 @@ class Tetris(arcade.Window):
         ESC: Pause the game
         F1: Pause the game
         P: Print grid to console
+        U: Undo the last piece
 
         Arguments:
             symbol {int} -- Which key was pressed
@@ -64,6 +139,7 @@ class Tetris(arcade.Window):
         """
         if symbol == arcade.key.Q:
             # Quit immediately
+            self.finish()
             arcade.close_window()
 
         if symbol == arcade.key.ESCAPE:
@@ -74,11 +150,22 @@ class Tetris(arcade.Window):
 
         if symbol == arcade.key.D:
             self.diagnostics = not self.diagnostics
+            if self.diagnostics:
+                profiler.enable()
+            elif not self.profile:
+                profiler.disable()
 
         if symbol == arcade.key.P:
-            print(self.grid)
+            print(self.engine.grid)
+
+        if symbol == arcade.key.U:
+            self.undo()
 
-        self.t.on_key_press(symbol, modifiers)
+        if symbol in KEY_PRESS_ACTIONS and not self.replay:
+            self.engine.apply(KEY_PRESS_ACTIONS[symbol])
+
+        if symbol in KEY_MOVE_ACTIONS and not self.replay:
+            self.input_handler.press(KEY_MOVE_ACTIONS[symbol])
 
     def on_key_release(self, symbol: int, modifiers: int):
         """Undo movement vectors when movement keys are released.
@@ -86,7 +173,11 @@ class Tetris(arcade.Window):
             symbol {int} -- Which key was pressed
             modifiers {int} -- Which modifiers were pressed
         """
-        self.t.on_key_release(symbol, modifiers)
+        if symbol in KEY_RELEASE_ACTIONS and not self.replay:
+            self.engine.apply(KEY_RELEASE_ACTIONS[symbol])
+
+        if symbol in KEY_MOVE_ACTIONS:
+            self.input_handler.release(KEY_MOVE_ACTIONS[symbol])
 
     def on_update(self, delta_time: float):
         """Update the positions and statuses of all game objects.
@@ -101,29 +192,31 @@ class Tetris(arcade.Window):
         if self.paused:
             return
 
-        if self.grid.refreshed:
-            # If grid is refreshed and a tetrimino exists, a lock down
-            # occurred. Calculate any points accrued or if the tetrimino
-            # was locked out.
-            if self.t:
-                self.calculate_points(self.grid.lines_cleared,
-                                      self.t.hard_drop_lock,
-                                      self.t.soft_drop_lock)
-                self.grid.lines_cleared = 0
+        level = self.engine.level
+        lines_cleared = self.engine.lines_cleared
 
-                if self.t.locked_out:
-                    self.game_over = True
+        if self.bot:
+            self.update_bot()
 
-            self.t = self.get_next_tetrimino()
+        if self.replay:
+            self.replay.update(delta_time)
+        else:
+            self.engine.update(delta_time)
 
-            if self.t.blocked_out:
-                self.game_over = True
+        t = self.engine.t
+        if self.undo_stack is not None and t is not self.undo_piece:
+            self.undo_piece = t
+            self.undo_stack.push(self.engine.snapshot())
 
-            self.grid.refreshed = False
+        self.play_line_clear_sound(self.engine.lines_cleared - lines_cleared)
+        if self.engine.level > level:
+            sound_bank.play('level_up')
 
-        self.t.on_update(delta_time)
+        shapes = self.engine.preview(self.next_queue.size)
+        if self.next_queue.shapes != tuple(shapes):
+            self.next_queue.update_next_queue(shapes)
 
-        if self.game_over:
+        if self.engine.game_over:
             self.trigger_game_over()
 
     def on_draw(self):
@@ -140,115 +233,125 @@ class Tetris(arcade.Window):
 
         arcade.start_render()  # Needs to be called before drawing
 
-        self.grid.draw()
-        self.t.draw()
+        self.engine.grid.draw()
+        self.engine.t.draw()
         self.next_queue.draw()
 
-        arcade.draw_text(f'Level: {self.level}',
-                         NEXT_QUEUE_CX,
-                         NEXT_QUEUE_CY - 40,
-                         arcade.color.BLACK,
-                         12,
-                         align='center')
-        arcade.draw_text(f'Lines Cleared: {self.lines_cleared}',
-                         NEXT_QUEUE_CX,
-                         NEXT_QUEUE_CY - 60,
-                         arcade.color.BLACK,
-                         12,
-                         align='center')
-        arcade.draw_text(f'Score: {self.points}',
-                         NEXT_QUEUE_CX,
-                         NEXT_QUEUE_CY - 80,
-                         arcade.color.BLACK,
-                         12,
-                         align='center')
-
-        if self.paused:
-            arcade.draw_text("PAUSED",
-                             SCREEN_WIDTH / 2,
-                             SCREEN_HEIGHT - 40,
-                             arcade.color.BLACK,
-                             26,
-                             align='center')
-
-        if self.diagnostics:
-            # Show diagnostics (Draw Time, FPS)
-            output = f"Drawing time: {self.draw_time:.3f}"
-            arcade.draw_text(output,
-                             20,
-                             SCREEN_HEIGHT - 20,
-                             arcade.color.BLACK,
-                             12)
-
-            if self.fps is not None:
-                output = f"FPS: {self.fps:.0f}"
-                arcade.draw_text(output,
-                                 20,
-                                 SCREEN_HEIGHT - 40,
-                                 arcade.color.BLACK,
-                                 12)
+        # Show diagnostics (Draw Time, FPS) only when enabled
+        draw_time = self.draw_time if self.diagnostics else None
+        fps = self.fps if self.diagnostics else None
+        self.hud.update(self.engine.level, self.engine.lines_cleared,
+                        self.engine.points, self.paused, draw_time, fps)
+        if not self.diagnostics:
+            self.hud.update_profile(None)
+        elif self.frame_count % PROFILE_REFRESH == 1:
+            self.hud.update_profile(profiler.lines())
+        self.hud.draw()
 
         self.draw_time = timeit.default_timer() - draw_start_time
 
-    def get_next_tetrimino(self):
-        """Retrieve the next random tetrimino using the "bag" system."""
-        t = Tetrimino(self.tetrimino_bag[self.t_index], self.grid, self.level)
-        self.t_index += 1
-        if self.t_index == len(Shape):
-            self.t_index = 0
-            self.tetrimino_bag = random.sample(list(Shape), len(Shape))
-
-        self.next_queue.update_next_queue(self.tetrimino_bag[self.t_index])
-        return t
+    def undo(self):
+        """Go back to when the previous piece spawned."""
+        if not self.undo_stack:
+            return
+        if len(self.undo_stack) > 1:
+            # The latest snapshot is the spawn of the piece in play
+            self.undo_stack.pop()
+        snapshot = self.undo_stack.pop()
+        self.engine.restore(snapshot)
+        self.undo_stack.push(snapshot)
+        self.undo_piece = self.engine.t
+
+    def update_bot(self):
+        """Let the bot move each new tetrimino and hard drop it."""
+        t = self.engine.t
+        if t is None or t is self.bot_piece:
+            return
+        self.bot_piece = t
+        for action in self.bot.plan(self.engine):
+            self.engine.apply(action)
+        self.engine.apply(Action.HARD_DROP)
 
-    def calculate_points(self, lines, hard_drop_rows, soft_drop_rows):
-        """Update score with given number of lines cleared.
+    def play_line_clear_sound(self, lines):
+        """Play the sound for the number of lines cleared.
 
         Arguments:
             lines {int} -- Number of lines cleared in latest grid refresh
-            hard_drop_rows {int} -- Number of rows the tetrimino hard dropped
-            soft_drop_rows {int} -- Number of rows the tetrimino soft dropped
         """
-        self.lines_cleared += lines
         if lines == 1:
-            self.points += 100 * self.level
-            arcade.play_sound(self.single_clear_sound)
+            sound_bank.play('single_clear')
         elif lines == 2:
-            self.points += 300 * self.level
-            arcade.play_sound(self.double_clear_sound)
+            sound_bank.play('double_clear')
         elif lines == 3:
-            self.points += 500 * self.level
-            arcade.play_sound(self.triple_clear_sound)
+            sound_bank.play('triple_clear')
         elif lines == 4:
-            self.points += 800 * self.level
-            arcade.play_sound(self.tetris_clear_sound)
-
-        self.level_line_counter += lines
-        if self.level_line_counter >= 10:
-            self.level += 1
-            self.level_line_counter -= 10
-            arcade.play_sound(self.level_up_sound)
-
-        if self.prev_lines_cleared == 4 and lines == 4:
-            self.points += 400  # B2B Bonus 0.5 of Tetris points
-
-        if hard_drop_rows > 0:
-            self.points += (hard_drop_rows * 2)
-
-        if soft_drop_rows > 0:
-            self.points += soft_drop_rows
-
-        self.prev_lines_cleared = lines
+            sound_bank.play('tetris_clear')
+
+    def finish(self):
+        """Finish the replay, events and profile before quitting."""
+        self.finish_recording()
+        self.engine.events.close()
+        if self.profile:
+            profiler.dump(self.profile)
+            self.profile = None
+
+    def finish_recording(self):
+        """Write the end of the replay, if one is being recorded."""
+        if self.recorder:
+            self.recorder.close(self.engine.clock.frame, self.engine.points,
+                                self.engine.lines_cleared)
+
+    def on_close(self):
+        """Finish the replay when the window is closed."""
+        self.finish()
+        super().on_close()
 
     def trigger_game_over(self):
         """Game Over."""
         print('Game Over')
+        self.finish()
         # Quit immediately
         arcade.close_window()  # TODO: Implement Game Over Screen
 
 
 if __name__ == '__main__':
-    tetris = Tetris(
-        int(SCREEN_WIDTH * SCALING), int(SCREEN_HEIGHT * SCALING), SCREEN_TITLE
-    )
-    arcade.run()
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument('--record', metavar='FILE',
+                        help='Stream a replay of the game to FILE')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='Watch a replay at real time')
+    parser.add_argument('--bot', action='store_true',
+                        help='Let the placement search bot play')
+    parser.add_argument('--fast', action='store_true',
+                        help='Re-simulate the replay at uncapped speed '
+                             'without rendering')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Profile every frame and write the timings to '
+                             'FILE (.csv or .json) on exit')
+    parser.add_argument('--preview', type=int, default=1, metavar='N',
+                        help='Show the next N pieces, up to 6')
+    parser.add_argument('--das', type=float, default=DAS, metavar='MS',
+                        help='Delay before a held move repeats')
+    parser.add_argument('--arr', type=float, default=ARR, metavar='MS',
+                        help='Time between repeated moves, 0 to move to '
+                             'the wall at once')
+    parser.add_argument('--events', metavar='FILE',
+                        help='Stream game events to FILE, as JSON lines or '
+                             'binary for a .bin file')
+    args = parser.parse_args()
+
+    if args.replay and args.fast:
+        player = ReplayPlayer(args.replay)
+        verified = player.run()
+        print(f'Score: {player.engine.points}  '
+              f'Lines: {player.engine.lines_cleared}  '
+              f'Verified: {verified}')
+    else:
+        tetris = Tetris(
+            int(SCREEN_WIDTH * SCALING), int(SCREEN_HEIGHT * SCALING),
+            SCREEN_TITLE, record=args.record, replay=args.replay,
+            bot=Bot() if args.bot else None, profile=args.profile,
+            preview=args.preview, das=args.das, arr=args.arr,
+            events=args.events
+        )
+        arcade.run()
@@ -1,85 +1,190 @@
-import arcade
-
-from constants import SIDE_MARGIN, BOTTOM_MARGIN, COLORS, DARK_GRAY, BLACK
+from bitboard import PAD, ROWS, COLUMNS, FULL_ROW, EMPTY_ROW
+from events import EventType
 
 
 class Grid():
 
     def __init__(self):
         self._grid = [[0]*12 for y in range(24)]
+        for i in range(21):
+            # Left, bottom and right borders
+            self._grid[i][0] = self._grid[i][11] = 1
+        self._grid[0] = [1] * 12
+        # Bitboard of the Matrix, one integer per row with the walls set
+        self.rows = [FULL_ROW] + [EMPTY_ROW] * (ROWS - 1)
+        # Surface height of each column, the row above its highest block
+        self.heights = [1] * COLUMNS
+        # Rows changed since the last render, so views can redraw only those
+        self.dirty_rows = set()
         self.lines_cleared = 0
+        # Rows removed by the latest lock down, for scoring and animation
+        self.cleared_rows = []
         self.refreshed = False
+        # Event bus of the game played on this grid, set by the Engine
+        self.events = None
         self.refresh()
 
-    def refresh(self):
-        """Refresh the grid with the latest positions of all the pieces."""
-        self.rect_list = arcade.ShapeElementList()
-
-        for i, row in enumerate(self._grid):
-            for j, column in enumerate(row):
-                x = SIDE_MARGIN + j * 24
-                y = BOTTOM_MARGIN + i * 24
-                if i < 21:
-                    if j == 0 or j == 11 or i == 0:
-                        self._grid[i][j] = 1
-                        # Color in left, bottom and right borders
-                        self.create_border_rect(x, y)
-                    elif self._grid[i][j] > 1:
-                        # Color in any game pieces on the board
-                        self.create_game_piece_rect(x, y, self._grid[i][j])
-                    self.create_grid_rect(x, y)
-        if self.check_for_line_clear():
-            self.refresh()
+    def refresh(self, rows=None):
+        """Clear any completed lines after a lock down.
+
+        Sets the refreshed flag so the game knows a lock down occurred.
+
+        Arguments:
+            rows {[int]} -- Rows touched by the locked piece, every row of the
+                Matrix by default
+
+        Returns:
+            [int] -- Indexes of the cleared rows, bottom first
+        """
+        self.cleared_rows = self.clear_lines(range(1, 21) if rows is None
+                                             else rows)
         self.refreshed = True
+        if self.events and self.cleared_rows:
+            self.events.emit(EventType.LINE_CLEAR, tuple(self.cleared_rows))
+        return self.cleared_rows
+
+    def collides(self, masks, x, y):
+        """Check if a shape overlaps any occupied cell or wall.
+
+        Arguments:
+            masks {((int, int),)} -- Row masks of the shape
+            x {int} -- X coordinate of the shape
+            y {int} -- Y coordinate of the shape
+
+        Returns:
+            bool -- True if a collision is detected. False, otherwise.
+        """
+        rows = self.rows
+        shift = x + PAD
+        for i, mask in masks:
+            if rows[y + i] & (mask << shift):
+                return True
+        return False
+
+    def fill(self, x, y, color):
+        """Occupy a single cell of the Matrix.
+
+        Arguments:
+            x {int} -- X coordinate of the cell
+            y {int} -- Y coordinate of the cell
+            color {int} -- Color index of the cell
+        """
+        self._grid[y][x] = color
+        self.rows[y] |= 1 << (x + PAD)
+        self.dirty_rows.add(y)
+        if y >= self.heights[x]:
+            self.heights[x] = y + 1
 
-    def check_for_line_clear(self):
-        """Check and update any lines that should be cleared.
+    def drop_distance(self, rotation, x, y):
+        """Find how far a piece falls before it rests on the surface.
 
-        Lines are cleared when the entire row is filled. Remove the row
-        and add a new empty row into the grid.
+        Above the surface height of every column it covers, the distance
+        comes straight from the height index. A piece tucked under an
+        overhang falls back to testing each row.
+
+        Arguments:
+            rotation {Rotation} -- Orientation of the piece
+            x {int} -- X coordinate of the piece
+            y {int} -- Y coordinate of the piece
 
         Returns:
-            int -- Number of lines cleared
+            int -- Rows the piece can move down
         """
-        num_cleared = 0
-        for i in range(1, 21):
-            if 0 not in set(self._grid[i]):
-                self._grid.append([1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1])
-                self._grid.pop(i)
-                num_cleared += 1
-        self.lines_cleared += num_cleared
-        return num_cleared
-
-    def create_border_rect(self, x, y):
-        rect = arcade.create_rectangle_filled(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=DARK_GRAY)
-        self.rect_list.append(rect)
-
-    def create_game_piece_rect(self, x, y, color):
-        rect = arcade.create_rectangle_filled(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=COLORS[color])
-        self.rect_list.append(rect)
-
-    def create_grid_rect(self, x, y):
-        rect = arcade.create_rectangle_outline(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=BLACK)
-        self.rect_list.append(rect)
-
-    def draw(self):
-        """Draw the play grid."""
-        self.rect_list.draw()
+        heights = self.heights
+        distance = ROWS
+        for dx, bottom in rotation.bottoms:
+            gap = y + bottom - heights[x + dx]
+            if gap < 0:
+                distance = 0
+                while not self.collides(rotation.masks, x, y - distance - 1):
+                    distance += 1
+                return distance
+            if gap < distance:
+                distance = gap
+        return distance
+
+    def update_heights(self):
+        """Rebuild the surface height of every column from the bitboard."""
+        heights = [1] * COLUMNS
+        remaining = list(range(1, COLUMNS - 1))
+        for y in range(max(self.heights) - 1, 0, -1):
+            row = self.rows[y]
+            for x in remaining:
+                if row >> (x + PAD) & 1:
+                    heights[x] = y + 1
+            remaining = [x for x in remaining if heights[x] == 1]
+            if not remaining:
+                break
+        self.heights = heights
+
+    def snapshot(self):
+        """Copy the Matrix into immutable values.
+
+        Returns:
+            tuple -- Cell colors as bytes, bitboard rows, column heights,
+                lines cleared, rows cleared by the last lock and whether a
+                lock down is waiting to be processed
+        """
+        return (bytes(cell for row in self._grid for cell in row),
+                tuple(self.rows), tuple(self.heights), self.lines_cleared,
+                tuple(self.cleared_rows), self.refreshed)
+
+    def restore(self, snapshot):
+        """Put the Matrix back to a snapshot taken by snapshot().
+
+        Every row is marked dirty so views redraw the whole Matrix.
+        """
+        cells, rows, heights, lines_cleared, cleared_rows, refreshed = snapshot
+        self._grid = [list(cells[i:i + COLUMNS])
+                      for i in range(0, len(cells), COLUMNS)]
+        self.rows = list(rows)
+        self.heights = list(heights)
+        self.lines_cleared = lines_cleared
+        self.cleared_rows = list(cleared_rows)
+        self.refreshed = refreshed
+        self.dirty_rows.update(range(ROWS))
+
+    def row_colors(self, y):
+        """Get the color index of every cell in a row, walls included.
+
+        Arguments:
+            y {int} -- Y coordinate of the row
+
+        Returns:
+            [int] -- 12 color indexes, 0 for an empty cell
+        """
+        return self._grid[y]
+
+    def clear_lines(self, rows):
+        """Clear the completed lines among the given rows.
+
+        Lines are cleared when the entire row is filled. Only rows a piece
+        just locked into can have been completed, so only those are checked.
+        The rows above the lowest cleared line are compacted down in a single
+        pass and new empty rows are added at the top of the Matrix.
+
+        Arguments:
+            rows {[int]} -- Rows to check
+
+        Returns:
+            [int] -- Indexes of the cleared rows, bottom first
+        """
+        bits = self.rows
+        cleared = sorted(i for i in set(rows)
+                         if 0 < i < 21 and bits[i] == FULL_ROW)
+        if not cleared:
+            return cleared
+
+        bottom = cleared[0]
+        kept = [i for i in range(bottom, ROWS) if i not in cleared]
+        empty = len(cleared)
+        bits[bottom:] = [bits[i] for i in kept] + [EMPTY_ROW] * empty
+        self._grid[bottom:] = ([self._grid[i] for i in kept]
+                               + [[1] + [0] * 10 + [1] for _ in cleared])
+        self.dirty_rows.update(range(bottom, ROWS))
+        self.update_heights()
+        self.lines_cleared += empty
+        return cleared
 
     def __str__(self):
         return '\n'.join([str(x) for x in reversed(self._grid)])
@@ -0,0 +1,89 @@
+import arcade
+import pyglet
+
+from constants import SCREEN_HEIGHT, SCREEN_WIDTH, NEXT_QUEUE_CX, NEXT_QUEUE_CY
+
+
+class Hud():
+
+    def __init__(self, offset=0):
+        """Initialize the heads-up display.
+
+        Every line of text is a persistent text object in one batch. Text is
+        laid out again only when the value it shows changes.
+
+        Arguments:
+            offset {int} -- Pixels to move the score down, to make room for
+                a longer next queue
+        """
+        self.batch = pyglet.graphics.Batch()
+        self.values = {}
+
+        y = NEXT_QUEUE_CY - offset
+        self.level = self.create_text(NEXT_QUEUE_CX, y - 40, 12, 'center')
+        self.lines_cleared = self.create_text(NEXT_QUEUE_CX, y - 60, 12,
+                                              'center')
+        self.points = self.create_text(NEXT_QUEUE_CX, y - 80, 12, 'center')
+        self.paused = self.create_text(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 40,
+                                       26, 'center')
+        self.draw_time = self.create_text(20, SCREEN_HEIGHT - 20, 12)
+        self.fps = self.create_text(20, SCREEN_HEIGHT - 40, 12)
+        # One line per profiler section, created as sections appear
+        self.profile = []
+
+    def create_text(self, x, y, size, align='left'):
+        return arcade.Text('', x, y, arcade.color.BLACK, size, align=align,
+                           batch=self.batch)
+
+    def set_text(self, text, value, template):
+        """Update a text object if the value it shows has changed.
+
+        Arguments:
+            text {arcade.Text} -- The text object
+            value {object} -- The value to show, None to hide the text
+            template {str} -- Format string for the value
+        """
+        if text in self.values and self.values[text] == value:
+            return
+        self.values[text] = value
+        text.text = '' if value is None else template.format(value)
+
+    def update(self, level, lines_cleared, points, paused, draw_time=None,
+               fps=None):
+        """Update the values shown on the display.
+
+        Arguments:
+            level {int} -- The current level
+            lines_cleared {int} -- Total lines cleared
+            points {int} -- The current score
+            paused {bool} -- Whether the game is paused
+            draw_time {float} -- Drawing time to show, None to hide it
+            fps {float} -- Frames per second to show, None to hide it
+        """
+        self.set_text(self.level, level, 'Level: {}')
+        self.set_text(self.lines_cleared, lines_cleared, 'Lines Cleared: {}')
+        self.set_text(self.points, points, 'Score: {}')
+        self.set_text(self.paused, True if paused else None, 'PAUSED')
+        self.set_text(self.draw_time,
+                      None if draw_time is None else round(draw_time, 3),
+                      'Drawing time: {:.3f}')
+        self.set_text(self.fps, None if fps is None else round(fps),
+                      'FPS: {:.0f}')
+
+    def update_profile(self, lines):
+        """Update the profiler lines shown under the diagnostics.
+
+        Arguments:
+            lines {[str]} -- One line per section, None to hide them all
+        """
+        lines = lines or []
+        while len(self.profile) < len(lines):
+            y = SCREEN_HEIGHT - 60 - 16 * len(self.profile)
+            self.profile.append(self.create_text(20, y, 10))
+        for i, text in enumerate(self.profile):
+            self.set_text(text, lines[i] if i < len(lines) else None, '{}')
+
+    def draw(self):
+        """Draw every text object in a single batch."""
+        with arcade.get_window().ctx.pyglet_rendering():
+            self.batch.draw()
@@ -0,0 +1,98 @@
+from clock import ms_to_ticks
+from engine import Action
+
+# Delayed Auto Shift: how long a direction is held before it repeats
+DAS = 167
+
+# Auto Repeat Rate: time between repeated moves, 0 to slide to the wall
+ARR = 33
+
+# Most repeated moves in one tick, enough to cross the Matrix
+MAX_REPEATS = 10
+
+OFFSETS = {
+    Action.MOVE_LEFT: -1,
+    Action.MOVE_RIGHT: 1,
+}
+
+
+class InputHandler():
+
+    def __init__(self, engine, das=DAS, arr=ARR):
+        """Initialize lateral movement with auto-repeat.
+
+        A move is applied as soon as its key goes down. Held keys repeat on
+        the simulation clock, so a repeat rate faster than the frame rate
+        moves several columns within one frame.
+
+        Arguments:
+            engine {Engine} -- The game to apply moves to
+            das {float} -- Delayed Auto Shift in ms
+            arr {float} -- Auto Repeat Rate in ms, 0 to move to the wall
+                at once
+        """
+        self.engine = engine
+        # Whole ticks, so repeats land on evenly spaced frames
+        self.das = round(ms_to_ticks(das))
+        self.arr = max(1, round(ms_to_ticks(arr))) if arr > 0 else 0
+        # Held directions, the most recently pressed last
+        self.held = []
+        self.held_ticks = 0
+        self.repeats = 0
+
+    def press(self, action):
+        """Move at once and start charging auto-repeat.
+
+        Arguments:
+            action {Action} -- MOVE_LEFT or MOVE_RIGHT
+        """
+        if action in self.held:
+            return
+        self.held.append(action)
+        self.charge()
+        self.engine.apply(action)
+
+    def release(self, action):
+        """Stop repeating a direction.
+
+        If the other direction is still held, it takes over and charges
+        again from the start.
+
+        Arguments:
+            action {Action} -- MOVE_LEFT or MOVE_RIGHT
+        """
+        if action not in self.held:
+            return
+        was_active = self.held[-1] == action
+        self.held.remove(action)
+        if was_active:
+            self.charge()
+
+    def charge(self):
+        self.held_ticks = 0
+        self.repeats = 0
+
+    def on_tick(self):
+        """Apply the repeated moves that are due before the next tick."""
+        if not self.held:
+            return
+        self.held_ticks += 1
+        if self.held_ticks < self.das:
+            return
+
+        if self.arr > 0:
+            due = (self.held_ticks - self.das) // self.arr + 1
+            moves = min(due - self.repeats, MAX_REPEATS)
+            self.repeats = due
+        else:
+            moves = MAX_REPEATS
+
+        action = self.held[-1]
+        dx = OFFSETS[action]
+        for _ in range(moves):
+            t = self.engine.t
+            # Stop at a wall without recording moves that cannot happen
+            if (t is None or t.hard_drop
+                    or t.is_collision_on_move(t.x + dx, t.y)):
+                break
+            self.engine.apply(action)
@@ -1,71 +1,98 @@
 import arcade
 
-from constants import (SIDE_MARGIN, BOTTOM_MARGIN, NEXT_QUEUE_CX,
-                       NEXT_QUEUE_CY, NEXT_QUEUE_X_OFFSET, NEXT_QUEUE_Y_OFFSET,
-                       NEXT_QUEUE_HEIGHT, NEXT_QUEUE_WIDTH, COLORS, WHITE,
-                       BLACK,)
+from shape import Shape
+from constants import COLORS, WHITE, BLACK
+from preview_layout import (queue_size, queue_box, queue_slots,
+                            preview_cells)
 
 
 class NextQueue():
 
-    def __init__(self):
-        """Initialize the Next Queue which displays the next Tetrimino that
+    def __init__(self, size=1):
+        """Initialize the Next Queue which displays the next Tetriminos that
         will be in play.
+
+        The first piece is shown at full size and the rest at half size
+        below it. The geometry of every shape is built once, then moved
+        into the slot it is shown in.
+
+        Arguments:
+            size {int} -- Number of pieces to show, from 1 to MAX_PREVIEW
         """
-        self.t_next = None
+        self.size = queue_size(size)
+        self.shapes = ()
+
+        center_x, center_y, width, height = queue_box(self.size)
         self.rects = arcade.ShapeElementList()
-        self.minos = arcade.ShapeElementList()
         self.box = arcade.create_rectangle_filled(
-            center_x=SIDE_MARGIN + NEXT_QUEUE_CX,
-            center_y=BOTTOM_MARGIN + NEXT_QUEUE_CY,
-            width=NEXT_QUEUE_WIDTH,
-            height=NEXT_QUEUE_HEIGHT,
+            center_x=center_x, center_y=center_y, width=width, height=height,
             color=WHITE)
         self.outline = arcade.create_rectangle_outline(
-            center_x=SIDE_MARGIN + NEXT_QUEUE_CX,
-            center_y=BOTTOM_MARGIN + NEXT_QUEUE_CY,
-            width=NEXT_QUEUE_WIDTH,
-            height=NEXT_QUEUE_HEIGHT,
+            center_x=center_x, center_y=center_y, width=width, height=height,
             color=BLACK)
         self.rects.append(self.box)
         self.rects.append(self.outline)
 
-    def update_next_queue(self, t_next):
-        """Update the next queue box with the next piece in the queue.
+        # Origin of the piece matrix in each slot, with its cell size
+        self.slots = queue_slots(self.size)
+
+        for cell_size in {cell_size for _, _, cell_size in self.slots}:
+            for shape in Shape:
+                preview_geometry(shape, cell_size)
+
+    def update_next_queue(self, shapes):
+        """Update the next queue box with the next pieces in the queue.
 
         Arguments:
-            t_next {Shape} -- The next shape that will be in play
+            shapes {[Shape]} -- The next shapes that will be in play, only
+                the first size of them are shown
         """
-        self.minos = arcade.ShapeElementList()
-        self.t_next = t_next
-
-        for i, row in enumerate(reversed(self.t_next.value[0])):
-            for j, block in enumerate(row):
-                if block > 1:
-                    x = SIDE_MARGIN + NEXT_QUEUE_X_OFFSET + (j) * 24 + 12
-                    y = BOTTOM_MARGIN + NEXT_QUEUE_Y_OFFSET + (i) * 24
-
-                    # Offset the tetrimino pieces to center in next queue box
-                    if self.t_next.value[1] in [2, 3]:
-                        x = SIDE_MARGIN + NEXT_QUEUE_X_OFFSET + (j) * 24
-                    if self.t_next.value[1] == 3:
-                        y = BOTTOM_MARGIN + NEXT_QUEUE_Y_OFFSET + (i) * 24 - 12
-
-                    self.minos.append(arcade.create_rectangle_filled(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=COLORS[self.t_next.value[1]]))
-
-                    self.minos.append(arcade.create_rectangle_outline(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=BLACK))
+        self.shapes = tuple(shapes[:self.size])
 
     def draw(self):
-        """Draw the background and tetrimino."""
+        """Draw the background and tetriminos."""
         self.rects.draw()
-        self.minos.draw()
+        for shape, (x, y, cell_size) in zip(self.shapes, self.slots):
+            geometry = preview_geometry(shape, cell_size)
+            geometry.center_x = x
+            geometry.center_y = y
+            geometry.draw()
+
+
+# Preview geometry keyed by (shape, cell size)
+_preview_geometry = {}
+
+
+def preview_geometry(shape, cell_size):
+    """Get the cached geometry of a shape in the next queue.
+
+    Arguments:
+        shape {Shape} -- The shape
+        cell_size {int} -- Size of each cell in pixels
+
+    Returns:
+        arcade.ShapeElementList -- Filled and outlined cells of the shape,
+            relative to the origin of its slot
+    """
+    key = (shape, cell_size)
+    geometry = _preview_geometry.get(key)
+    if geometry is not None:
+        return geometry
+
+    geometry = arcade.ShapeElementList()
+    for x, y in preview_cells(shape, cell_size):
+        geometry.append(arcade.create_rectangle_filled(
+            center_x=x,
+            center_y=y,
+            width=cell_size,
+            height=cell_size,
+            color=COLORS[shape.color]))
+
+        geometry.append(arcade.create_rectangle_outline(
+            center_x=x,
+            center_y=y,
+            width=cell_size,
+            height=cell_size,
+            color=BLACK))
+    _preview_geometry[key] = geometry
+    return geometry
@@ -0,0 +1,85 @@
+from constants import (SIDE_MARGIN, BOTTOM_MARGIN, NEXT_QUEUE_CX,
+                       NEXT_QUEUE_CY, NEXT_QUEUE_X_OFFSET, NEXT_QUEUE_Y_OFFSET,
+                       NEXT_QUEUE_HEIGHT, NEXT_QUEUE_WIDTH,
+                       NEXT_QUEUE_SLOT_HEIGHT, CELL_SIZE, SMALL_CELL_SIZE,
+                       MAX_PREVIEW)
+
+# Layout of the next queue, shared by the Arcade window and the offscreen
+# rasterizer so both draw it in the same place.
+
+
+def queue_size(size):
+    """Clamp the number of pieces shown to what the queue can hold."""
+    return max(1, min(size, MAX_PREVIEW))
+
+
+def queue_box(size):
+    """Get the box drawn behind the next queue.
+
+    Arguments:
+        size {int} -- Number of pieces shown
+
+    Returns:
+        (float, float, int, int) -- Center x and y, width and height of the
+            box in window coordinates
+    """
+    extra_height = (size - 1) * NEXT_QUEUE_SLOT_HEIGHT
+    return (SIDE_MARGIN + NEXT_QUEUE_CX,
+            BOTTOM_MARGIN + NEXT_QUEUE_CY - extra_height / 2,
+            NEXT_QUEUE_WIDTH, NEXT_QUEUE_HEIGHT + extra_height)
+
+
+def queue_slots(size):
+    """Get the slots of the next queue.
+
+    The first piece is shown at full size and the rest at half size below
+    it.
+
+    Arguments:
+        size {int} -- Number of pieces shown
+
+    Returns:
+        [(float, float, int)] -- Origin of the piece matrix in each slot,
+            with its cell size
+    """
+    slots = [(SIDE_MARGIN + NEXT_QUEUE_X_OFFSET,
+              BOTTOM_MARGIN + NEXT_QUEUE_Y_OFFSET, CELL_SIZE)]
+    scale = SMALL_CELL_SIZE / CELL_SIZE
+    for i in range(1, size):
+        center_y = (NEXT_QUEUE_CY - NEXT_QUEUE_HEIGHT / 2
+                    - (i - 0.5) * NEXT_QUEUE_SLOT_HEIGHT)
+        slots.append((
+            SIDE_MARGIN + NEXT_QUEUE_CX
+            - (NEXT_QUEUE_CX - NEXT_QUEUE_X_OFFSET) * scale,
+            BOTTOM_MARGIN + center_y
+            - (NEXT_QUEUE_CY - NEXT_QUEUE_Y_OFFSET) * scale,
+            SMALL_CELL_SIZE))
+    return slots
+
+
+def preview_cells(shape, cell_size):
+    """Get the cells of a shape shown in a next queue slot.
+
+    Arguments:
+        shape {Shape} -- The shape
+        cell_size {int} -- Size of each cell in pixels
+
+    Returns:
+        [(float, float)] -- Center of each cell, relative to the origin of
+            its slot
+    """
+    cells = []
+    half = cell_size / 2
+    for i, row in enumerate(reversed(shape.matrix)):
+        for j, block in enumerate(row):
+            if block > 1:
+                x = j * cell_size + half
+                y = i * cell_size
+
+                # Offset the tetrimino pieces to center in next queue box
+                if shape.color in [2, 3]:
+                    x = j * cell_size
+                if shape.color == 3:
+                    y = i * cell_size - half
+                cells.append((x, y))
+    return cells
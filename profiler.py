@@ -0,0 +1,185 @@
+import csv
+import json
+import time
+from collections import deque
+from functools import wraps
+
+# Samples kept per section for the rolling percentiles, about 10 seconds of
+# frames at 60 FPS
+WINDOW = 600
+
+PERCENTILES = (50, 95, 99)
+
+
+class Section():
+
+    def __init__(self, window=WINDOW):
+        """Initialize the timings of one instrumented stage.
+
+        Arguments:
+            window {int} -- Most recent samples kept for percentiles
+        """
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        """Summarize the timings in milliseconds.
+
+        Returns:
+            dict -- Sample count, mean and worst time since the start, and
+                p50, p95 and p99 over the rolling window
+        """
+        ordered = sorted(self.samples)
+        summary = {
+            'count': self.count,
+            'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+            'max_ms': 1000 * self.max,
+        }
+        for p in PERCENTILES:
+            if ordered:
+                # Nearest rank
+                value = ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+            else:
+                value = 0.0
+            summary[f'p{p}_ms'] = 1000 * value
+        return summary
+
+
+class Profiler():
+
+    def __init__(self, window=WINDOW):
+        """Initialize a profiler for the stages of each frame.
+
+        Stages are timed by wrapping methods while the profiler is enabled.
+        The original methods are put back when it is disabled, so there is
+        no cost at all while profiling is off.
+
+        Arguments:
+            window {int} -- Most recent samples kept per section
+        """
+        self.window = window
+        self.enabled = False
+        self.sections = {}
+        self.targets = []
+        self.originals = []
+
+    def watch(self, cls, method, name=None):
+        """Time every call of a method while the profiler is enabled.
+
+        Arguments:
+            cls {type} -- Class whose method is timed, including inherited
+                methods
+            method {str} -- Name of the method
+            name {str} -- Section the time is added to, the method name by
+                default. Several methods can share a section.
+        """
+        target = (cls, method, name or method)
+        if target in self.targets:
+            return
+        self.targets.append(target)
+        if self.enabled:
+            self.wrap(*target)
+
+    def wrap(self, cls, method, name):
+        func = getattr(cls, method)
+        # Only methods defined on the class itself are put back, inherited
+        # ones are removed again
+        self.originals.append((cls, method, cls.__dict__.get(method)))
+        add = self.section(name).add
+        clock = time.perf_counter
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(clock() - start)
+
+        setattr(cls, method, timed)
+
+    def section(self, name):
+        """Get the timings of a section, creating it if needed."""
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self.window)
+        return section
+
+    def enable(self):
+        """Start timing every watched method."""
+        if self.enabled:
+            return
+        self.enabled = True
+        for cls, method, name in self.targets:
+            self.wrap(cls, method, name)
+
+    def disable(self):
+        """Stop timing and restore the original methods."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for cls, method, original in reversed(self.originals):
+            if original is None:
+                delattr(cls, method)
+            else:
+                setattr(cls, method, original)
+        self.originals = []
+
+    def add(self, name, seconds):
+        """Record a time measured by the caller.
+
+        Arguments:
+            name {str} -- Section the time is added to
+            seconds {float} -- The time in seconds
+        """
+        self.section(name).add(seconds)
+
+    def summary(self):
+        """Summarize every section.
+
+        Returns:
+            {str: dict} -- Timings in milliseconds of each section
+        """
+        return {name: section.summary()
+                for name, section in self.sections.items()}
+
+    def lines(self):
+        """Format the rolling percentiles of every section for display.
+
+        Returns:
+            [str] -- One line per section
+        """
+        return [f'{name}: p50 {s["p50_ms"]:.2f}  p95 {s["p95_ms"]:.2f}  '
+                f'p99 {s["p99_ms"]:.2f} ms'
+                for name, s in self.summary().items()]
+
+    def dump(self, path):
+        """Write the summary of every section to a file.
+
+        Arguments:
+            path {str} -- A .csv file, or JSON for any other extension
+        """
+        summary = self.summary()
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                fields = ['section', 'count', 'mean_ms', 'max_ms'] + [
+                    f'p{p}_ms' for p in PERCENTILES]
+                writer = csv.DictWriter(f, fields)
+                writer.writeheader()
+                for name, s in summary.items():
+                    writer.writerow(dict(s, section=name))
+            else:
+                json.dump(summary, f, indent=2)
+
+
+# Shared by every module that registers sections
+profiler = Profiler()
@@ -0,0 +1,353 @@
+import argparse
+import os
+import struct
+import sys
+import zlib
+from multiprocessing import Pool
+
+import numpy as np
+
+from clock import TICK_RATE
+from preview_layout import (queue_size, queue_box, queue_slots,
+                            preview_cells)
+from replay import ReplayPlayer
+
+from constants import (SCREEN_WIDTH, SCREEN_HEIGHT, SIDE_MARGIN,
+                       BOTTOM_MARGIN, CELL_SIZE, SMALL_CELL_SIZE, COLORS,
+                       WHITE, GRAY, DARK_GRAY, BLACK,)
+
+# Tile keys of ghost cells, above the color indexes of locked cells
+GHOST = 16
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def cell_tile(size, color):
+    """Build a filled cell with a black outline.
+
+    Arguments:
+        size {int} -- Width and height in pixels
+        color {(int, int, int)} -- RGB fill color
+
+    Returns:
+        ndarray -- (size, size, 3) uint8 tile
+    """
+    tile = np.empty((size, size, 3), dtype=np.uint8)
+    tile[:] = color
+    tile[0, :] = tile[-1, :] = tile[:, 0] = tile[:, -1] = BLACK
+    return tile
+
+
+def ghost_tile(color):
+    """Build an empty cell holding the 2 pixel outline of a ghost cell."""
+    tile = cell_tile(CELL_SIZE, GRAY)
+    tile[2:22, 2:4] = tile[2:22, 20:22] = color
+    tile[2:4, 2:22] = tile[20:22, 2:22] = color
+    return tile
+
+
+class Rasterizer():
+
+    def __init__(self, preview=1):
+        """Initialize an offscreen RGB frame laid out like the game window.
+
+        The frame is kept between renders and only the cells that changed
+        are drawn again, so a frame costs a few small array copies.
+
+        Arguments:
+            preview {int} -- Number of pieces shown in the next queue
+        """
+        self.frame = np.empty((SCREEN_HEIGHT, SCREEN_WIDTH, 3),
+                              dtype=np.uint8)
+        self.frame[:] = GRAY
+
+        # Tiles keyed by color index, and by GHOST + color for ghost cells
+        self.tiles = {0: cell_tile(CELL_SIZE, GRAY),
+                      1: cell_tile(CELL_SIZE, DARK_GRAY)}
+        self.small_tiles = {}
+        for color in range(2, len(COLORS)):
+            self.tiles[color] = cell_tile(CELL_SIZE, COLORS[color])
+            self.tiles[GHOST + color] = ghost_tile(COLORS[color])
+            self.small_tiles[color] = cell_tile(SMALL_CELL_SIZE,
+                                                COLORS[color])
+
+        # Tile key shown in each cell of the Matrix, walls included
+        self.shown = {}
+        for y in range(21):
+            for x in range(12):
+                self.show(x, y, 1 if x == 0 or x == 11 or y == 0 else 0)
+        # Cells the piece in play and its ghost are drawn over
+        self.overlay = {}
+        self.grid = None
+
+        # Next queue, laid out like NextQueue
+        self.size = queue_size(preview)
+        self.shapes = None
+        center_x, center_y, width, height = queue_box(self.size)
+        self.box = np.empty((height, width, 3), dtype=np.uint8)
+        self.box[:] = WHITE
+        self.box[0, :] = self.box[-1, :] = BLACK
+        self.box[:, 0] = self.box[:, -1] = BLACK
+        self.box_center = (center_x, center_y)
+        self.slots = queue_slots(self.size)
+
+    def blit(self, center_x, center_y, tile):
+        """Copy a tile into the frame.
+
+        Arguments:
+            center_x {float} -- X coordinate of the center of the tile, in
+                window coordinates with the origin at the bottom left
+            center_y {float} -- Y coordinate of the center of the tile
+            tile {ndarray} -- (height, width, 3) uint8 pixels
+        """
+        height, width = tile.shape[:2]
+        left = int(round(center_x - width / 2))
+        top = SCREEN_HEIGHT - int(round(center_y + height / 2))
+        self.frame[top:top + height, left:left + width] = tile
+
+    def show(self, x, y, key):
+        """Draw a tile in a cell of the Matrix unless it is already shown."""
+        if self.shown.get((x, y)) != key:
+            self.shown[x, y] = key
+            self.blit(SIDE_MARGIN + x * CELL_SIZE,
+                      BOTTOM_MARGIN + y * CELL_SIZE, self.tiles[key])
+
+    def render(self, engine):
+        """Draw the current state of a game.
+
+        Only the rows the grid marked dirty, the cells under the piece in
+        play and its ghost, and the next queue when it changes are drawn.
+
+        Arguments:
+            engine {Engine} -- The game
+
+        Returns:
+            ndarray -- The (SCREEN_HEIGHT, SCREEN_WIDTH, 3) RGB frame, reused
+                by the next render
+        """
+        grid = engine.grid
+        if grid is not self.grid:
+            # A new game, compare every row
+            self.grid = grid
+            grid.dirty_rows.update(range(1, 21))
+
+        colors = {}
+        for y in grid.dirty_rows:
+            if y == 0 or y >= 21:
+                continue
+            row = grid.row_colors(y)
+            for x in range(1, 11):
+                colors[x, y] = row[x]
+        grid.dirty_rows.clear()
+
+        # Cells left by the previous piece show the grid again
+        for x, y in self.overlay:
+            if (x, y) not in colors:
+                colors[x, y] = grid.row_colors(y)[x]
+
+        overlay = {}
+        t = engine.t
+        if t is not None:
+            distance = t.drop_distance()
+            for dx, dy in t.state.cells:
+                x, y = t.x + dx, t.y + dy
+                if distance > 0 and y - distance < 21:
+                    overlay[x, y - distance] = GHOST + t.color
+            for dx, dy in t.state.cells:
+                x, y = t.x + dx, t.y + dy
+                if y < 21:
+                    overlay[x, y] = t.color
+        self.overlay = overlay
+
+        for (x, y), color in colors.items():
+            if (x, y) not in overlay:
+                self.show(x, y, color)
+        for (x, y), key in overlay.items():
+            self.show(x, y, key)
+
+        shapes = tuple(engine.preview(self.size))
+        if shapes != self.shapes:
+            self.shapes = shapes
+            self.draw_next_queue()
+        return self.frame
+
+    def draw_next_queue(self):
+        self.blit(*self.box_center, self.box)
+        for shape, (slot_x, slot_y, cell_size) in zip(self.shapes,
+                                                      self.slots):
+            tiles = self.tiles if cell_size == CELL_SIZE else self.small_tiles
+            for x, y in preview_cells(shape, cell_size):
+                self.blit(slot_x + x, slot_y + y, tiles[shape.color])
+
+
+def encode_png(frame, level=6):
+    """Encode an RGB frame as a PNG image.
+
+    Arguments:
+        frame {ndarray} -- (height, width, 3) uint8 pixels
+        level {int} -- zlib compression level
+
+    Returns:
+        bytes -- The PNG file
+    """
+    height, width = frame.shape[:2]
+    # Every scanline starts with filter type 0
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = frame.reshape(height, width * 3)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data)))
+
+    return (PNG_SIGNATURE
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0,
+                                         0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), level))
+            + chunk(b'IEND', b''))
+
+
+class ImageSequenceWriter():
+
+    def __init__(self, pattern):
+        """Write every frame to its own image file.
+
+        Arguments:
+            pattern {str} -- Path with an {index} field for the frame number,
+                such as frames/{index:06d}.png. PNG, or binary PPM for a .ppm
+                pattern
+        """
+        self.pattern = pattern
+        self.ppm = pattern.endswith('.ppm')
+        self.index = 0
+
+    def write(self, frame):
+        path = self.pattern.format(index=self.index)
+        self.index += 1
+        with open(path, 'wb') as f:
+            if self.ppm:
+                height, width = frame.shape[:2]
+                f.write(b'P6\n%d %d\n255\n' % (width, height))
+                f.write(frame.data)
+            else:
+                f.write(encode_png(frame))
+
+    def close(self):
+        pass
+
+
+class RawVideoWriter():
+
+    def __init__(self, path):
+        """Append frames to a raw rgb24 video stream.
+
+        Arguments:
+            path {str} -- The video file, or - for standard output
+        """
+        if path == '-':
+            self.file = sys.stdout.buffer
+            self.owned = False
+        else:
+            self.file = open(path, 'wb')
+            self.owned = True
+
+    def write(self, frame):
+        self.file.write(frame.data)
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def open_writer(path):
+    """Open an image sequence for a path with an {index} field, or a raw
+    video stream for any other path."""
+    if '{index' in path:
+        return ImageSequenceWriter(path)
+    return RawVideoWriter(path)
+
+
+def export(path, output, every=1, start=0, end=None, preview=1):
+    """Render a replay offscreen and stream its frames.
+
+    Arguments:
+        path {str} -- The replay file
+        output {str} -- Passed to open_writer()
+        every {int} -- Ticks between frames, 1 for 60 frames per second
+        start {int} -- Tick of the first frame
+        end {int} -- Stop before this tick, at the end of the replay by
+            default
+        preview {int} -- Number of pieces shown in the next queue
+
+    Returns:
+        int -- Number of frames written
+    """
+    player = ReplayPlayer(path)
+    rasterizer = Rasterizer(preview)
+    writer = open_writer(output)
+    frames = 0
+    try:
+        while True:
+            frame = player.engine.clock.frame
+            if end is not None and frame >= end:
+                break
+            if frame >= start and (frame - start) % every == 0:
+                writer.write(rasterizer.render(player.engine))
+                frames += 1
+            if player.done or player.engine.game_over:
+                break
+            player.tick()
+    finally:
+        writer.close()
+    return frames
+
+
+def export_job(job):
+    path, output, every, start, end, preview = job
+    name = os.path.splitext(os.path.basename(path))[0]
+    output = output.replace('{name}', name)
+    return path, export(path, output, every, start, end, preview)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Render replays to images or raw video without a '
+                    'window.')
+    parser.add_argument('replays', nargs='+', metavar='REPLAY')
+    parser.add_argument('--output', '-o', required=True,
+                        help='Raw rgb24 video file, - for standard output, '
+                             'or an image pattern such as '
+                             'frames/{index:06d}.png. {name} is replaced '
+                             'by the name of each replay')
+    parser.add_argument('--every', type=int, default=1, metavar='TICKS',
+                        help='Ticks between frames, 1 by default')
+    parser.add_argument('--start', type=int, default=0, metavar='TICK',
+                        help='Tick of the first frame')
+    parser.add_argument('--end', type=int, metavar='TICK',
+                        help='Stop before this tick')
+    parser.add_argument('--preview', type=int, default=1, metavar='N',
+                        help='Pieces shown in the next queue')
+    parser.add_argument('--workers', type=int,
+                        help='Processes, one per core by default')
+    args = parser.parse_args()
+
+    if len(args.replays) > 1 and '{name}' not in args.output:
+        parser.error('--output needs a {name} field for several replays')
+
+    jobs = [(path, args.output, args.every, args.start, args.end,
+             args.preview) for path in args.replays]
+    if len(jobs) == 1:
+        results = [export_job(jobs[0])]
+    else:
+        with Pool(args.workers or os.cpu_count()) as pool:
+            results = list(pool.imap_unordered(export_job, jobs))
+    if args.output != '-':
+        fps = TICK_RATE / args.every
+        for path, frames in results:
+            print(f'{path}: {frames} frames of {SCREEN_WIDTH}x'
+                  f'{SCREEN_HEIGHT} at {fps:g} FPS', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import time
+
+from engine import Action, Engine
+from tetrimino import Tetrimino
+from varint import read_varint, write_varint
+
+# File layout: a stream of chunks, each one a varint byte length followed by
+# its payload. The first chunk is the header (MAGIC, VERSION, varint seed).
+# Every later chunk holds events, each encoded as one varint of
+# (frames since the previous event << 4) | event code. The END event is
+# followed by the final points and lines cleared as varints.
+MAGIC = b'TTRP'
+VERSION = 1
+
+# Event codes above the Action values
+LOCK = 14
+END = 15
+
+# Events buffered before a chunk is written to disk
+CHUNK_EVENTS = 256
+
+
+class ReplayRecorder():
+
+    def __init__(self, path, seed):
+        """Start streaming a replay to a file.
+
+        Arguments:
+            path {str} -- Where to write the replay
+            seed {int} -- Seed of the game's tetrimino bag
+        """
+        self.file = open(path, 'wb')
+        self.buffer = bytearray()
+        self.events = 0
+        self.last_frame = 0
+
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        write_varint(header, seed)
+        self.write_chunk(header)
+
+    def on_action(self, frame, action):
+        """Record a player action applied before the given tick."""
+        self.add_event(frame, int(action))
+
+    def on_lock(self, frame):
+        """Record a lock down processed on the given tick."""
+        self.add_event(frame, LOCK)
+
+    def add_event(self, frame, code):
+        self.write_event(frame, code)
+        if self.events >= CHUNK_EVENTS:
+            self.flush()
+
+    def write_event(self, frame, code):
+        write_varint(self.buffer, (frame - self.last_frame) << 4 | code)
+        self.last_frame = frame
+        self.events += 1
+
+    def flush(self):
+        """Write the buffered events as one chunk."""
+        if self.buffer:
+            self.write_chunk(self.buffer)
+            self.buffer = bytearray()
+            self.events = 0
+
+    def write_chunk(self, payload):
+        prefix = bytearray()
+        write_varint(prefix, len(payload))
+        self.file.write(prefix)
+        self.file.write(payload)
+        self.file.flush()
+
+    def close(self, frame, points, lines_cleared):
+        """Record the end of the game and close the file.
+
+        Arguments:
+            frame {int} -- Tick the game ended on
+            points {int} -- Final score
+            lines_cleared {int} -- Final number of lines cleared
+        """
+        if self.file.closed:
+            return
+        # END and its payload must share a chunk, so no flush in between
+        self.write_event(frame, END)
+        write_varint(self.buffer, points)
+        write_varint(self.buffer, lines_cleared)
+        self.flush()
+        self.file.close()
+
+
+def read_replay(path):
+    """Read a replay file.
+
+    Arguments:
+        path {str} -- The replay file
+
+    Returns:
+        (int, [(int, int, tuple)]) -- The bag seed and a list of
+            (frame, event code, payload) events
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        length, pos = read_varint(data, pos)
+        chunks.append(data[pos:pos + length])
+        pos += length
+
+    header = chunks[0]
+    if header[:4] != MAGIC or header[4] != VERSION:
+        raise ValueError(f'{path} is not a replay file')
+    seed, _ = read_varint(header, 5)
+
+    events = []
+    frame = 0
+    for chunk in chunks[1:]:
+        pos = 0
+        while pos < len(chunk):
+            value, pos = read_varint(chunk, pos)
+            frame += value >> 4
+            code = value & 0xf
+            payload = ()
+            if code == END:
+                points, pos = read_varint(chunk, pos)
+                lines_cleared, pos = read_varint(chunk, pos)
+                payload = (points, lines_cleared)
+            events.append((frame, code, payload))
+    return seed, events
+
+
+class ReplayPlayer():
+
+    def __init__(self, path, grid=None, tetrimino_class=Tetrimino):
+        """Prepare a replay for playback on a new engine.
+
+        Arguments:
+            path {str} -- The replay file
+            grid {Grid} -- The Matrix to play on, a new Grid by default
+            tetrimino_class {type} -- Class used to spawn each tetrimino
+        """
+        seed, self.events = read_replay(path)
+        self.engine = Engine(grid, tetrimino_class, seed=seed, recorder=self)
+        self.index = 0
+
+        # Audit results
+        self.recorded_locks = 0
+        self.desyncs = 0
+        self.final = None
+
+        self.play_due_events()
+
+    def on_action(self, frame, action):
+        pass
+
+    def on_lock(self, frame):
+        pass
+
+    @property
+    def done(self):
+        """Whether every event has been played back."""
+        return self.index >= len(self.events)
+
+    def tick(self):
+        """Run the next tick, then play the events recorded up to it."""
+        if self.done:
+            return
+        engine = self.engine
+        if engine.game_over:
+            # The recorded game went on after the replayed one ended
+            self.desyncs += 1
+            frame, code, payload = self.events[-1]
+            if code == END:
+                self.final = payload
+            self.index = len(self.events)
+            return
+        engine.tick()
+        self.play_due_events()
+
+    def play_due_events(self):
+        """Play every event recorded on or before the current tick.
+
+        Lock downs and the end of the game are recorded while a tick runs,
+        and actions between ticks, so all of them are due once the tick
+        they were recorded on has run.
+        """
+        engine = self.engine
+        while not self.done:
+            frame, code, payload = self.events[self.index]
+            if frame > engine.clock.frame:
+                break
+            self.index += 1
+            if code == LOCK:
+                self.recorded_locks += 1
+                if engine.pieces != self.recorded_locks:
+                    self.desyncs += 1
+            elif code == END:
+                self.final = payload
+            else:
+                engine.apply(Action(code))
+
+    def update(self, delta_time):
+        """Play back in real time.
+
+        Arguments:
+            delta_time {float} -- Time since the last update in seconds
+        """
+        for _ in range(self.engine.clock.advance(delta_time)):
+            self.tick()
+
+    def run(self):
+        """Play the whole replay back as fast as possible.
+
+        Returns:
+            bool -- True if the replay matched the recorded game
+        """
+        while not self.done:
+            self.tick()
+        return self.verified
+
+    @property
+    def verified(self):
+        """Whether the replayed game matched every recorded lock and score."""
+        engine = self.engine
+        return (self.desyncs == 0 and self.final is not None
+                and self.final == (engine.points, engine.lines_cleared))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Re-simulate a replay without rendering.')
+    parser.add_argument('replay', help='Replay file to play back')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Play back at real time instead of uncapped')
+    args = parser.parse_args()
+
+    player = ReplayPlayer(args.replay)
+    start = time.perf_counter()
+    if args.realtime:
+        last = start
+        while not player.done:
+            time.sleep(player.engine.clock.tick_time)
+            now = time.perf_counter()
+            player.update(now - last)
+            last = now
+    else:
+        player.run()
+    elapsed = time.perf_counter() - start
+
+    engine = player.engine
+    print(f'Score: {engine.points}  Lines: {engine.lines_cleared}  '
+          f'Pieces: {engine.pieces}  Ticks: {engine.clock.frame}  '
+          f'Time: {elapsed:.3f}s')
+    print('Verified' if player.verified else 'MISMATCH')
+
+
+if __name__ == '__main__':
+    main()
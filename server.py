@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import random
+
+from clock import SimulationClock
+from engine import Action, Engine
+from varint import read_varint, write_varint
+from shape import Shape
+
+# Stream layout, server to client: a header (MAGIC, VERSION, varint seed),
+# then one message per update that changed anything, each a varint byte
+# length followed by its payload. Client to server: one byte per Action.
+MAGIC = b'TTSV'
+VERSION = 1
+
+# Flags of a message, telling which parts follow its varint frame number
+GRID = 1
+PIECE = 2
+NEXT = 4
+SCORE = 8
+GAME_OVER = 16
+
+SHAPES = list(Shape)
+
+# Offset added to piece coordinates so they are never negative
+COORD_OFFSET = 2
+
+# Bytes a client may leave unread before it is disconnected
+MAX_BUFFERED = 1 << 20
+
+
+def pack_row(colors):
+    """Pack the 10 interior cells of a row, two color indexes per byte."""
+    return bytes(colors[j] << 4 | colors[j + 1] for j in range(1, 11, 2))
+
+
+def unpack_row(data):
+    """Unpack a row packed by pack_row() into its 10 color indexes."""
+    colors = []
+    for byte in data:
+        colors.append(byte >> 4)
+        colors.append(byte & 0xf)
+    return colors
+
+
+class Session():
+
+    def __init__(self, seed, writer):
+        """Initialize a headless game played by one client.
+
+        Arguments:
+            seed {int} -- Seed of the game's tetrimino bag
+            writer {asyncio.StreamWriter} -- Stream to the client
+        """
+        self.engine = Engine(seed=seed)
+        self.writer = writer
+        # Last state sent, so only what changed is sent again
+        self.piece = None
+        self.next_shape = None
+        self.score = None
+        self.game_over = False
+        self.engine.grid.dirty_rows.update(range(1, 21))
+        # Bring the first piece into play now, so actions sent before the
+        # first tick are not dropped
+        self.engine.process_lock_down()
+
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        write_varint(header, seed)
+        writer.write(header)
+
+    def apply(self, data):
+        """Apply actions received from the client.
+
+        Arguments:
+            data {bytes} -- One Action value per byte, unknown values are
+                ignored
+        """
+        for code in data:
+            if code < len(Action):
+                self.engine.apply(Action(code))
+
+    def tick(self, ticks):
+        """Advance the game and send the client what changed.
+
+        Arguments:
+            ticks {int} -- Simulation ticks to run
+        """
+        engine = self.engine
+        for _ in range(ticks):
+            if engine.game_over:
+                break
+            engine.tick()
+        message = self.delta()
+        if message is not None:
+            self.writer.write(message)
+
+    def delta(self):
+        """Encode the changes since the last message.
+
+        Returns:
+            bytearray -- A length prefixed message, or None if nothing
+                changed
+        """
+        engine = self.engine
+        grid = engine.grid
+        payload = bytearray()
+        flags = 0
+
+        rows = [y for y in sorted(grid.dirty_rows) if 0 < y < 21]
+        grid.dirty_rows.clear()
+        if rows:
+            flags |= GRID
+            write_varint(payload, len(rows))
+            for y in rows:
+                payload.append(y)
+                payload += pack_row(grid.row_colors(y))
+
+        t = engine.t
+        piece = None
+        if t is not None:
+            piece = (SHAPES.index(t.shape), t.rotation,
+                     t.x + COORD_OFFSET, t.y + COORD_OFFSET)
+        if piece != self.piece and piece is not None:
+            flags |= PIECE
+            payload += bytes(piece)
+        self.piece = piece
+
+        if engine.next_shape is not self.next_shape:
+            flags |= NEXT
+            payload.append(SHAPES.index(engine.next_shape))
+            self.next_shape = engine.next_shape
+
+        score = (engine.points, engine.lines_cleared, engine.level)
+        if score != self.score:
+            flags |= SCORE
+            for value in score:
+                write_varint(payload, value)
+            self.score = score
+
+        if engine.game_over and not self.game_over:
+            flags |= GAME_OVER
+            self.game_over = True
+
+        if not flags:
+            return None
+        header = bytearray()
+        write_varint(header, engine.clock.frame)
+        header.append(flags)
+        message = bytearray()
+        write_varint(message, len(header) + len(payload))
+        return message + header + payload
+
+
+def decode_delta(payload):
+    """Decode a message sent by the server, for clients written in Python.
+
+    Arguments:
+        payload {bytes} -- A message without its length prefix
+
+    Returns:
+        dict -- The tick it was sent on, with only the parts that changed:
+            'rows' {{int: [int]}} colors of each changed row, 'piece'
+            (Shape, rotation, x, y), 'next' Shape, 'score' (points, lines,
+            level) and 'game_over'
+    """
+    frame, pos = read_varint(payload, 0)
+    flags = payload[pos]
+    pos += 1
+    delta = {'frame': frame}
+    if flags & GRID:
+        count, pos = read_varint(payload, pos)
+        rows = {}
+        for _ in range(count):
+            rows[payload[pos]] = unpack_row(payload[pos + 1:pos + 6])
+            pos += 6
+        delta['rows'] = rows
+    if flags & PIECE:
+        shape, rotation, x, y = payload[pos:pos + 4]
+        delta['piece'] = (SHAPES[shape], rotation, x - COORD_OFFSET,
+                          y - COORD_OFFSET)
+        pos += 4
+    if flags & NEXT:
+        delta['next'] = SHAPES[payload[pos]]
+        pos += 1
+    if flags & SCORE:
+        score = []
+        for _ in range(3):
+            value, pos = read_varint(payload, pos)
+            score.append(value)
+        delta['score'] = tuple(score)
+    if flags & GAME_OVER:
+        delta['game_over'] = True
+    return delta
+
+
+class GameServer():
+
+    def __init__(self, seed=None, clock=None):
+        """Initialize a server hosting many headless games in one process.
+
+        Every session is stepped by the server's own fixed tick clock, and
+        the changes are sent to each client once per update.
+
+        Arguments:
+            seed {int} -- Session i plays the bag of seed + i, random seeds
+                by default
+            clock {SimulationClock} -- Clock driving every session
+        """
+        self.seed = seed
+        self.clock = clock if clock is not None else SimulationClock()
+        self.sessions = set()
+        self.count = 0
+
+    def next_seed(self):
+        if self.seed is None:
+            return random.getrandbits(32)
+        return self.seed + self.count
+
+    async def handle(self, reader, writer):
+        """Host a game for one connected client until it ends."""
+        session = Session(self.next_seed(), writer)
+        self.count += 1
+        self.sessions.add(session)
+        try:
+            while not session.game_over:
+                data = await reader.read(256)
+                if not data:
+                    break
+                session.apply(data)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def run(self):
+        """Tick every session on the server clock until cancelled."""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while True:
+            await asyncio.sleep(self.clock.tick_time)
+            now = loop.time()
+            ticks = self.clock.advance(now - last)
+            last = now
+            for _ in range(ticks):
+                self.clock.tick()
+            for session in list(self.sessions):
+                if session.writer.is_closing():
+                    continue
+                session.tick(ticks)
+                transport = session.writer.transport
+                if session.game_over:
+                    session.writer.close()
+                elif transport.get_write_buffer_size() > MAX_BUFFERED:
+                    # The client stopped reading
+                    session.writer.close()
+
+    async def serve(self, host='127.0.0.1', port=7777, path=None):
+        """Accept clients and tick their games until cancelled.
+
+        Arguments:
+            host {str} -- TCP address to listen on
+            port {int} -- TCP port to listen on
+            path {str} -- Listen on this Unix socket instead of TCP
+        """
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await self.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Host many headless games for clients on one process.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='TCP address to listen on')
+    parser.add_argument('--port', type=int, default=7777,
+                        help='TCP port to listen on')
+    parser.add_argument('--unix', metavar='PATH',
+                        help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--seed', type=int,
+                        help='Session i plays the bag of SEED + i')
+    args = parser.parse_args()
+
+    server = GameServer(args.seed)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
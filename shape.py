@@ -1,5 +1,8 @@
+from collections import namedtuple
 from enum import Enum
 
+from bitboard import build_masks
+
 
 class Shape(Enum):
     O = ([[0, 2, 2],
@@ -37,3 +40,58 @@ class Shape(Enum):
           [0, 8, 8],
           [0, 0, 0]],
          8)
+
+    @property
+    def matrix(self):
+        """The shape matrix in its spawn orientation."""
+        return self.value[0]
+
+    @property
+    def color(self):
+        """The color index of the shape."""
+        return self.value[1]
+
+    @property
+    def rotations(self):
+        """The four rotation states of the shape, clockwise from spawn."""
+        return ROTATIONS[self]
+
+
+# A single orientation of a shape.
+#   matrix -- The rotated shape matrix
+#   cells -- (x, y) offsets of the occupied cells, bottom row first
+#   bbox -- (min_x, min_y, max_x, max_y) of the occupied cells
+#   masks -- (row offset, bitmask) pairs for bitboard collision tests
+#   bottoms -- (x offset, lowest y offset) of each occupied column
+Rotation = namedtuple('Rotation',
+                      ['matrix', 'cells', 'bbox', 'masks', 'bottoms'])
+
+
+def build_rotation(matrix):
+    """Precompute the geometry of a single orientation.
+
+    Arguments:
+        matrix {((int,),)} -- The shape matrix
+
+    Returns:
+        Rotation -- The precomputed orientation
+    """
+    cells = tuple((j, i) for i, row in enumerate(reversed(matrix))
+                  for j, block in enumerate(row) if block)
+    xs = [x for x, y in cells]
+    ys = [y for x, y in cells]
+    bbox = (min(xs), min(ys), max(xs), max(ys))
+    bottoms = tuple((x, min(cy for cx, cy in cells if cx == x))
+                    for x in sorted(set(xs)))
+    return Rotation(matrix, cells, bbox, build_masks(matrix), bottoms)
+
+
+def build_rotations(matrix):
+    """Precompute the four clockwise orientations of a shape matrix."""
+    matrices = [tuple(tuple(row) for row in matrix)]
+    for _ in range(3):
+        matrices.append(tuple(zip(*reversed(matrices[-1]))))
+    return tuple(build_rotation(m) for m in matrices)
+
+
+ROTATIONS = {shape: build_rotations(shape.matrix) for shape in Shape}
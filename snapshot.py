@@ -0,0 +1,48 @@
+from collections import deque, namedtuple
+
+# An immutable copy of a whole game. The generator state of the bag is
+# shared by the snapshots taken between two bags, the rest is a few hundred
+# bytes.
+#   grid -- Grid.snapshot(): cell colors as bytes, bitboard rows and column
+#       heights as tuples, and the lock down status
+#   piece -- Tetrimino.snapshot() of the piece in play, or None
+#   bag -- Bag.snapshot(): bags drawn, generator state and queued shapes
+#   stats -- Level, level line counter, previous lines cleared, lines
+#       cleared, points, pieces, rows cleared by the last lock and game over
+#   frame -- Simulation tick of the game clock
+Snapshot = namedtuple('Snapshot', ['grid', 'piece', 'bag', 'stats', 'frame'])
+
+# Snapshots kept by an undo stack by default
+UNDO_LIMIT = 100
+
+
+class UndoStack():
+
+    def __init__(self, limit=UNDO_LIMIT):
+        """Initialize a bounded history of snapshots.
+
+        Snapshots are immutable, so pushing one only stores a reference.
+        The oldest snapshot is dropped once the limit is reached.
+
+        Arguments:
+            limit {int} -- Most snapshots kept
+        """
+        self.snapshots = deque(maxlen=limit)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def push(self, snapshot):
+        """Remember a snapshot to go back to."""
+        self.snapshots.append(snapshot)
+
+    def pop(self):
+        """Take the most recent snapshot.
+
+        Returns:
+            Snapshot -- The snapshot, or None if the history is empty
+        """
+        return self.snapshots.pop() if self.snapshots else None
+
+    def clear(self):
+        self.snapshots.clear()
@@ -0,0 +1,87 @@
+import threading
+
+SOUND_FILES = {
+    'fall': 'sounds/PieceFall.ogg',
+    'move': 'sounds/PieceMoveLR.ogg',
+    'rotate': 'sounds/PieceRotateLR.ogg',
+    'rotate_fail': 'sounds/PieceRotateFail.ogg',
+    'lockdown': 'sounds/PieceLockdown.ogg',
+    'touchdown': 'sounds/PieceTouchDown.ogg',
+    'hard_drop': 'sounds/PieceHardDrop.ogg',
+    'single_clear': 'sounds/ClearSingle.ogg',
+    'double_clear': 'sounds/ClearDouble.ogg',
+    'triple_clear': 'sounds/ClearTriple.ogg',
+    'tetris_clear': 'sounds/ClearQuad.ogg',
+    'level_up': 'sounds/LevelUp.ogg',
+}
+
+
+class SoundBank():
+
+    def __init__(self, enabled=True):
+        """Initialize a bank that decodes each sound once and shares it.
+
+        Arcade is only imported when a sound is loaded, so a disabled bank
+        works without any audio or window system.
+
+        Arguments:
+            enabled {bool} -- Play sounds. If False, play is a no-op.
+        """
+        self.enabled = enabled
+        self.sounds = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def preload(self, background=False):
+        """Decode every sound asset ahead of time.
+
+        Arguments:
+            background {bool} -- Decode on a daemon thread and return at once
+        """
+        if not self.enabled:
+            return
+        if background:
+            self.thread = threading.Thread(target=self.load_all, daemon=True)
+            self.thread.start()
+        else:
+            self.load_all()
+
+    def load_all(self):
+        """Decode every sound asset that is not loaded yet."""
+        for name in SOUND_FILES:
+            self.load(name)
+
+    def load(self, name):
+        """Get the shared handle of a sound, decoding it on first use.
+
+        Arguments:
+            name {str} -- Name of the sound in SOUND_FILES
+
+        Returns:
+            arcade.Sound -- The decoded sound
+        """
+        with self.lock:
+            sound = self.sounds.get(name)
+            if sound is None:
+                import arcade
+                sound = arcade.load_sound(SOUND_FILES[name])
+                self.sounds[name] = sound
+        return sound
+
+    def play(self, name):
+        """Play a sound if the bank is enabled.
+
+        Arguments:
+            name {str} -- Name of the sound in SOUND_FILES
+        """
+        if not self.enabled:
+            return
+        sound = self.sounds.get(name) or self.load(name)
+        import arcade
+        arcade.play_sound(sound)
+
+
+# Process-wide bank shared by every game object. It stays disabled until a
+# game window turns it on, so headless games, the tournament, the server
+# and the benchmarks never load audio.
+sound_bank = SoundBank(enabled=False)
@@ -0,0 +1,282 @@
+import argparse
+import math
+
+import arcade
+import pyglet
+
+from bot import Bot
+from engine import Action, Engine
+from replay import ReplayPlayer
+
+from constants import COLORS, WHITE, BLACK
+
+# Size of a board slot in cells: the Matrix, a header row with the score
+# and next piece above it, and a gap around it
+SLOT_WIDTH = 11
+SLOT_HEIGHT = 24
+HEADER_HEIGHT = 3
+
+# Ticks a bot waits before dropping each piece, so games stay watchable
+BOT_DELAY = 15
+
+
+class LiveBoard():
+
+    def __init__(self, seed, bot, delay=BOT_DELAY):
+        """Initialize a board played live by a bot.
+
+        A new game starts on the next seed when the game is over.
+
+        Arguments:
+            seed {int} -- Seed of the first game
+            bot {Bot} -- The bot playing, shared between boards
+            delay {int} -- Ticks before the bot drops each piece
+        """
+        self.seed = seed
+        self.bot = bot
+        self.delay = delay
+        self.engine = Engine(seed=seed)
+
+    def update(self, delta_time):
+        engine = self.engine
+        if engine.game_over:
+            self.seed += 1
+            self.engine = Engine(seed=self.seed)
+            return
+        t = engine.t
+        if t is not None and t.frame >= self.delay and not t.hard_drop:
+            for action in self.bot.plan(engine):
+                engine.apply(action)
+            engine.apply(Action.HARD_DROP)
+        engine.update(delta_time)
+
+
+class ReplayBoard():
+
+    def __init__(self, path):
+        """Initialize a board playing back a replay at real time.
+
+        Arguments:
+            path {str} -- The replay file
+        """
+        self.player = ReplayPlayer(path)
+        self.engine = self.player.engine
+
+    def update(self, delta_time):
+        self.player.update(delta_time)
+
+
+class BoardView():
+
+    def __init__(self, sprite_list, batch, left, bottom, cell):
+        """Initialize the sprites of one board on the wall.
+
+        Every cell of the Matrix, the piece in play and the next piece is a
+        sprite in the shared sprite list. Cells are recolored in place when
+        their row changes, so a board costs nothing to draw on its own.
+
+        Arguments:
+            sprite_list {arcade.SpriteList} -- List shared by every board
+            batch {pyglet.graphics.Batch} -- Batch shared by every score
+            left {float} -- X coordinate of the left of the Matrix
+            bottom {float} -- Y coordinate of the bottom of the Matrix
+            cell {float} -- Size of a cell in pixels
+        """
+        self.left = left
+        self.bottom = bottom
+        self.cell = cell
+        self.engine = None
+
+        background = arcade.SpriteSolidColor(int(10 * cell), int(20 * cell),
+                                             BLACK)
+        background.center_x = left + 5 * cell
+        background.center_y = bottom + 10 * cell
+        sprite_list.append(background)
+
+        self.cells = {}
+        self.cell_colors = [[0] * 12 for i in range(21)]
+        for y in range(1, 21):
+            for x in range(1, 11):
+                sprite = self.create_sprite(sprite_list, cell)
+                sprite.center_x, sprite.center_y = self.position(x, y)
+                self.cells[x, y] = sprite
+
+        self.piece = [self.create_sprite(sprite_list, cell)
+                      for _ in range(4)]
+        self.next = [self.create_sprite(sprite_list, cell / 2)
+                     for _ in range(4)]
+        self.piece_key = None
+        self.next_shape = None
+
+        self.score = arcade.Text('', left, bottom + 20 * cell + cell / 2,
+                                 WHITE, max(6, int(cell * 0.8)), batch=batch)
+        self.points = None
+
+    def create_sprite(self, sprite_list, size):
+        sprite = arcade.SpriteSolidColor(max(1, int(size) - 1),
+                                         max(1, int(size) - 1), WHITE)
+        sprite.alpha = 0
+        sprite_list.append(sprite)
+        return sprite
+
+    def position(self, x, y):
+        """Center of the cell at the given Matrix coordinates."""
+        return (self.left + (x - 0.5) * self.cell,
+                self.bottom + (y - 0.5) * self.cell)
+
+    def update(self, engine):
+        """Bring the sprites up to date with a game.
+
+        Only rows the grid marked dirty are recolored. The piece sprites
+        move only when the piece changes.
+
+        Arguments:
+            engine {Engine} -- The game shown on this board
+        """
+        grid = engine.grid
+        if engine is not self.engine:
+            # A new game, redraw all of it
+            self.engine = engine
+            grid.dirty_rows.update(range(1, 21))
+            self.piece_key = self.next_shape = None
+
+        for y in grid.dirty_rows:
+            if y == 0 or y >= 21:
+                continue
+            row = grid.row_colors(y)
+            colors = self.cell_colors[y]
+            for x in range(1, 11):
+                if colors[x] != row[x]:
+                    colors[x] = row[x]
+                    self.paint(self.cells[x, y], row[x])
+        grid.dirty_rows.clear()
+
+        t = engine.t
+        key = None if t is None else t.key
+        if key != self.piece_key:
+            self.piece_key = key
+            cells = () if t is None else t.state.cells
+            for sprite, (dx, dy) in zip(self.piece, cells):
+                x, y = t.x + dx, t.y + dy
+                sprite.center_x, sprite.center_y = self.position(x, y)
+                self.paint(sprite, t.color if y < 21 else 0)
+
+        next_shape = engine.next_shape
+        if next_shape is not self.next_shape:
+            self.next_shape = next_shape
+            # Right-aligned in the header, above the Matrix
+            half = self.cell / 2
+            rotation = next_shape.rotations[0]
+            min_x, min_y, max_x, _ = rotation.bbox
+            left = self.left + 10 * self.cell - (max_x - min_x + 1) * half
+            bottom = self.bottom + 20 * self.cell + half
+            for sprite, (dx, dy) in zip(self.next, rotation.cells):
+                sprite.center_x = left + (dx - min_x + 0.5) * half
+                sprite.center_y = bottom + (dy - min_y + 0.5) * half
+                self.paint(sprite, next_shape.color)
+
+        if engine.points != self.points:
+            self.points = engine.points
+            self.score.text = str(engine.points)
+
+    def paint(self, sprite, color):
+        if color > 1:
+            sprite.color = COLORS[color]
+            sprite.alpha = 255
+        else:
+            sprite.alpha = 0
+
+
+def layout(n, width, height):
+    """Arrange boards in the grid of slots that gives them the largest cells.
+
+    Arguments:
+        n {int} -- Number of boards
+        width {int} -- Window width
+        height {int} -- Window height
+
+    Returns:
+        (int, float) -- Columns of boards and the cell size in pixels
+    """
+    best = (1, 0)
+    for columns in range(1, n + 1):
+        rows = math.ceil(n / columns)
+        cell = min(width / (columns * SLOT_WIDTH),
+                   height / (rows * SLOT_HEIGHT))
+        if cell > best[1]:
+            best = (columns, cell)
+    return best
+
+
+class SpectatorWall(arcade.Window):
+
+    def __init__(self, width, height, boards):
+        """Initialize a window showing many boards at once.
+
+        Every board is drawn from one shared sprite list and every score
+        from one text batch, so the whole wall is two draw calls.
+
+        Arguments:
+            width {int} -- Window width
+            height {int} -- Window height
+            boards {[LiveBoard or ReplayBoard]} -- The games to show
+        """
+        super().__init__(width, height, 'Tetris Spectator')
+        arcade.set_background_color(arcade.color.GRAY)
+        self.boards = boards
+        self.sprite_list = arcade.SpriteList()
+        self.batch = pyglet.graphics.Batch()
+        self.paused = False
+
+        columns, cell = layout(len(boards), width, height)
+        self.views = []
+        for i in range(len(boards)):
+            column, row = i % columns, i // columns
+            left = (column * SLOT_WIDTH + 0.5) * cell
+            top = height - row * SLOT_HEIGHT * cell
+            bottom = top - (HEADER_HEIGHT + 20) * cell
+            self.views.append(BoardView(self.sprite_list, self.batch, left,
+                                        bottom, cell))
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == arcade.key.Q:
+            arcade.close_window()
+        if symbol in (arcade.key.ESCAPE, arcade.key.F1):
+            self.paused = not self.paused
+
+    def on_update(self, delta_time):
+        if self.paused:
+            return
+        for board, view in zip(self.boards, self.views):
+            board.update(delta_time)
+            view.update(board.engine)
+
+    def on_draw(self):
+        arcade.start_render()
+        self.sprite_list.draw()
+        with self.ctx.pyglet_rendering():
+            self.batch.draw()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Watch many live or replayed games in one window.')
+    parser.add_argument('--boards', type=int, default=16,
+                        help='Live bot games to show, 16 by default')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Board i starts on seed SEED + i')
+    parser.add_argument('--replay', nargs='+', metavar='FILE',
+                        help='Show these replays instead of live games')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    if args.replay:
+        boards = [ReplayBoard(path) for path in args.replay]
+    else:
+        bot = Bot(depth=1)
+        # Space the seeds apart so restarted games do not repeat a neighbour
+        boards = [LiveBoard(args.seed + i * 1000, bot)
+                  for i in range(args.boards)]
+    SpectatorWall(args.width, args.height, boards)
+    arcade.run()
@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from batch_env import (BatchEnv, HARD_DROP, LEFT, NOOP, RIGHT, ROTATE_CCW,
+                       ROTATE_CW, SHAPES)
+from bot import Bot
+from engine import Action, Engine
+
+ACTIONS = {
+    Action.MOVE_LEFT: LEFT,
+    Action.MOVE_RIGHT: RIGHT,
+    Action.ROTATE_CW: ROTATE_CW,
+    Action.ROTATE_CCW: ROTATE_CCW,
+}
+
+
+def garbage(engine, rng, rows):
+    """Fill the bottom rows with one hole each, most of them in one column."""
+    well = rng.randrange(1, 11)
+    for y in range(1, rows + 1):
+        hole = well if rng.random() < 0.8 else rng.randrange(1, 11)
+        for x in range(1, 11):
+            if x != hole:
+                engine.grid.fill(x, y, rng.randrange(2, 9))
+
+
+def test_reset_no_boards():
+    env = BatchEnv(4, seed=0)
+    env.reset([])
+    env.reset(np.flatnonzero(env.done))
+    assert not env.done.any()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_engine(seed):
+    """Play the same pieces and moves on both and compare every lock."""
+    rng = random.Random(seed)
+    engine = Engine(seed=seed)
+    garbage(engine, rng, rng.randrange(2, 8))
+    engine.process_lock_down()
+    env = BatchEnv(1, seed=seed, gravity=False)
+    bot = Bot(depth=1)
+
+    lines = 0
+    for _ in range(40):
+        if engine.game_over:
+            break
+        # Deal the engine's piece on the same board
+        # Grid leaves the walls open above the Matrix, BatchEnv does not
+        env.boards[0, :, 1:11] = np.array(engine.grid._grid)[:, 1:11]
+        t = engine.t
+        env.shape[0] = SHAPES.index(t.shape)
+        env.rotation[0], env.x[0], env.y[0] = t.rotation, t.x, t.y
+        env.level[0] = engine.level
+
+        # The bot's placement, or a random one if it tucks under a ledge
+        plan = bot.plan(engine)
+        if Action.MOVE_DOWN in plan:
+            dx = rng.randrange(-5, 6)
+            plan = [Action.ROTATE_CW] * rng.randrange(4) + \
+                [Action.MOVE_LEFT if dx < 0 else Action.MOVE_RIGHT] * abs(dx)
+        for action in plan:
+            engine.apply(action)
+            env.step([ACTIONS[action]])
+            assert (env.rotation[0], env.x[0], env.y[0]) == \
+                (t.rotation, t.x, t.y)
+
+        engine.drop()
+        engine.lock()
+        points, cleared, done = env.step([HARD_DROP])
+        lines += cleared[0]
+        assert done[0] == engine.game_over
+        if engine.game_over:
+            break
+        assert (env.boards[0, :, 1:11] ==
+                np.array(engine.grid._grid)[:, 1:11]).all()
+        assert env.points[0] == engine.points
+        assert env.lines_cleared[0] == engine.lines_cleared
+        assert env.level[0] == engine.level
+    assert lines == engine.lines_cleared > 0
+
+
+def test_noop_without_gravity_keeps_the_piece():
+    env = BatchEnv(3, seed=1, gravity=False)
+    before = env.y.copy()
+    env.step(np.full(3, NOOP))
+    assert (env.y == before).all()
@@ -0,0 +1,43 @@
+from bot import WEIGHTS, Bot, LRUCache, evaluate, place, search
+from engine import Engine
+from grid import Grid
+from shape import Shape
+
+
+def well_rows(depth):
+    """Bitboard rows with every column but the last filled to depth."""
+    grid = Grid()
+    for y in range(1, depth + 1):
+        for x in range(1, 10):
+            grid.fill(x, y, 2)
+    return tuple(grid.rows)
+
+
+def test_lookahead_counts_the_first_placement_lines():
+    rows = well_rows(4)
+    # A vertical I in the well clears four lines, then the O lands on an
+    # empty Matrix
+    cleared, lines, _ = place(rows, Shape.I, 1, 8, 1)
+    assert lines == 4
+    best_o = max(evaluate(place(cleared, Shape.O, 0, x, 1)[0], 0)
+                 for x in range(0, 9))
+    assert search(rows, (Shape.I, Shape.O), 2) >= \
+        WEIGHTS[1] * 4 + best_o
+
+
+def test_plan_and_search_use_separate_caches():
+    engine = Engine(seed=2)
+    bot = Bot(depth=2, cache_size=1000)
+    for _ in range(5):
+        bot.play_piece(engine)
+    assert bot.paths.entries
+    assert all(isinstance(path, list) for path in bot.paths.entries.values())
+    assert all(isinstance(score, float)
+               for score in bot.cache.entries.values())
+
+
+def test_search_cache_gives_the_same_scores():
+    rows = well_rows(3)
+    shapes = (Shape.T, Shape.S)
+    assert search(rows, shapes, 2, cache=LRUCache(100)) == \
+        search(rows, shapes, 2)
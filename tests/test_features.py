@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+
+from bot import Bot, evaluate
+from engine import Engine
+from features import extract, landing_height, occupancy
+from grid import Grid
+from shape import Shape
+
+
+def board():
+    """A small board with every feature worked out by hand.
+
+    Column 1 is 3 high, column 2 is 3 high with a hole in row 2, column 3
+    is an empty well between columns 2 and 4, and column 4 is a single
+    block in row 2 over a hole.
+    """
+    grid = Grid()
+    for x, y in [(1, 1), (1, 2), (1, 3), (2, 1), (2, 3), (4, 2)]:
+        grid.fill(x, y, 2)
+    return grid
+
+
+def test_hand_computed_board():
+    features = extract(board())
+    assert features['heights'].tolist() == [[3, 3, 0, 2, 0, 0, 0, 0, 0, 0]]
+    assert features['aggregate_height'].tolist() == [8]
+    assert features['max_height'].tolist() == [3]
+    assert features['holes'].tolist() == [2]
+    assert features['bumpiness'].tolist() == [7]
+    assert features['wells'].tolist() == [2]
+    assert features['row_transitions'].tolist() == [42]
+    assert features['column_transitions'].tolist() == [14]
+
+
+def test_empty_board():
+    features = extract(Grid())
+    assert features['heights'].tolist() == [[0] * 10]
+    assert features['aggregate_height'].tolist() == [0]
+    assert features['max_height'].tolist() == [0]
+    assert features['holes'].tolist() == [0]
+    assert features['bumpiness'].tolist() == [0]
+    assert features['wells'].tolist() == [0]
+    assert features['row_transitions'].tolist() == [40]
+    assert features['column_transitions'].tolist() == [10]
+
+
+def test_full_board():
+    cells = np.array(Grid()._grid)
+    cells[1:21, 1:11] = 3
+    features = extract(cells)
+    assert features['heights'].tolist() == [[20] * 10]
+    assert features['aggregate_height'].tolist() == [200]
+    assert features['max_height'].tolist() == [20]
+    assert features['holes'].tolist() == [0]
+    assert features['bumpiness'].tolist() == [0]
+    assert features['wells'].tolist() == [0]
+    assert features['row_transitions'].tolist() == [0]
+    assert features['column_transitions'].tolist() == [10]
+
+
+def test_empty_batch():
+    assert occupancy([]).shape == (0, 23, 10)
+    features = extract([])
+    assert features['heights'].shape == (0, 10)
+    for name in ('aggregate_height', 'max_height', 'holes', 'bumpiness',
+                 'wells', 'row_transitions', 'column_transitions'):
+        assert features[name].shape == (0,)
+
+
+def test_grids_and_arrays_agree():
+    grid = board()
+    from_grid = extract([grid, Grid()])
+    from_array = extract(np.array([grid._grid, Grid()._grid]))
+    for name, values in from_grid.items():
+        assert np.array_equal(values, from_array[name])
+
+
+def test_bot_evaluation_matches():
+    engine = Engine(seed=11)
+    bot = Bot(depth=1)
+    rng = random.Random(0)
+    for _ in range(60):
+        bot.play_piece(engine)
+        # Leave holes for the features to find
+        engine.grid.fill(rng.randint(1, 10), rng.randint(1, 4), 2)
+        rows = tuple(engine.grid.rows)
+        features = extract(engine.grid)
+        assert evaluate(rows, 0, (1, 0, 0, 0)) == \
+            features['aggregate_height'][0]
+        assert evaluate(rows, 0, (0, 0, 1, 0)) == features['holes'][0]
+        assert evaluate(rows, 0, (0, 0, 0, 1)) == features['bumpiness'][0]
+
+
+def test_landing_height():
+    assert landing_height(Shape.O, 0, 0).tolist() == [1.5]
+    assert landing_height([Shape.I, Shape.I], [0, 1], [0, 0]).tolist() == \
+        [2.0, 1.5]
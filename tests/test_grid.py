@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from grid import Grid
+from shape import Shape
+
+
+def random_grid(rng, density=0.4, height=14):
+    grid = Grid()
+    for y in range(1, rng.randrange(1, height + 1)):
+        for x in range(1, 11):
+            if rng.random() < density:
+                grid.fill(x, y, rng.randrange(2, 9))
+    return grid
+
+
+def walk_collides(grid, rotation, x, y):
+    """Collision test by looking at every cell the piece covers."""
+    for dx, dy in rotation.cells:
+        cx, cy = x + dx, y + dy
+        if not 0 <= cy < 24 or not 0 <= cx < 12:
+            return True
+        if cx in (0, 11) or grid._grid[cy][cx] != 0:
+            return True
+    return False
+
+
+def compact(cells):
+    """Remove the full rows of the Matrix and add empty rows at the top."""
+    kept = [row for y, row in enumerate(cells)
+            if y == 0 or y >= 21 or not all(row[1:11])]
+    return kept + [[1] + [0] * 10 + [1] for _ in range(24 - len(kept))]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_collides_matches_a_cell_walk(seed):
+    rng = random.Random(seed)
+    grid = random_grid(rng)
+    for shape in Shape:
+        for rotation in shape.rotations:
+            for x in range(-2, 12):
+                for y in range(0, 21):
+                    assert grid.collides(rotation.masks, x, y) == \
+                        walk_collides(grid, rotation, x, y)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_clear_lines_matches_row_compaction(seed):
+    rng = random.Random(seed)
+    grid = random_grid(rng, density=0.5)
+    full = rng.sample(range(1, 21), rng.randrange(0, 5))
+    for y in full:
+        for x in range(1, 11):
+            grid.fill(x, y, 2)
+    cells = [row[:] for row in grid._grid]
+    full = [y for y in range(1, 21) if all(cells[y][1:11])]
+
+    assert grid.clear_lines(range(1, 21)) == full
+    assert grid._grid == compact(cells)
+    assert grid.lines_cleared == len(full)
+    # The bitboard and heights agree with the compacted cells
+    fresh = Grid()
+    for y in range(1, 24):
+        for x in range(1, 11):
+            if grid._grid[y][x]:
+                fresh.fill(x, y, grid._grid[y][x])
+    assert grid.rows == fresh.rows
+    assert grid.heights == fresh.heights
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_heights_and_drop_distance(seed):
+    rng = random.Random(seed)
+    grid = random_grid(rng)
+    for x in range(1, 11):
+        filled = [y for y in range(1, 24) if grid._grid[y][x]]
+        assert grid.heights[x] == max(filled, default=0) + 1
+    for shape in Shape:
+        for rotation in shape.rotations:
+            min_x, _, max_x, max_y = rotation.bbox
+            for x in range(1 - min_x, 11 - max_x):
+                for y in range(rng.randrange(0, 4), 24 - max_y):
+                    if walk_collides(grid, rotation, x, y):
+                        continue
+                    distance = 0
+                    while not walk_collides(grid, rotation, x,
+                                            y - distance - 1):
+                        distance += 1
+                    assert grid.drop_distance(rotation, x, y) == distance
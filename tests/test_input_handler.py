@@ -0,0 +1,46 @@
+import pytest
+
+from engine import Action
+from input_handler import InputHandler
+
+
+class Piece():
+    hard_drop = False
+    x = y = 0
+
+    def is_collision_on_move(self, x, y):
+        return False
+
+
+class Recorder():
+    """Stands in for an Engine, noting the tick of every applied move."""
+
+    def __init__(self):
+        self.t = Piece()
+        self.frame = 0
+        self.moves = []
+
+    def apply(self, action):
+        self.moves.append(self.frame)
+
+
+def repeat_frames(das, arr, ticks=16):
+    engine = Recorder()
+    handler = InputHandler(engine, das, arr)
+    handler.press(Action.MOVE_RIGHT)
+    for engine.frame in range(1, ticks):
+        handler.on_tick()
+    return engine.moves
+
+
+@pytest.mark.parametrize('das, arr, frames', [
+    (167, 33, [0, 10, 12, 14]),
+    (167, 50, [0, 10, 13]),
+    (100, 10, [0, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]),
+])
+def test_repeat_frames(das, arr, frames):
+    assert repeat_frames(das, arr) == frames
+
+
+def test_zero_arr_slides_on_the_das_tick():
+    assert repeat_frames(50, 0, ticks=4) == [0] + [3] * 10
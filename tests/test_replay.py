@@ -0,0 +1,48 @@
+from bot import Bot
+from engine import Action, Engine
+from replay import CHUNK_EVENTS, END, ReplayPlayer, ReplayRecorder, read_replay
+
+
+def record(path, seed, pieces, end_at=None):
+    """Record a bot game of at least the given number of pieces.
+
+    With end_at, keep going until exactly that many events are buffered, so
+    END lands at a chosen place in its chunk.
+    """
+    bot = Bot(depth=1)
+    recorder = ReplayRecorder(str(path), seed)
+    engine = Engine(seed=seed, recorder=recorder)
+    engine.process_lock_down()
+    while not engine.game_over:
+        if engine.pieces >= pieces and (end_at is None
+                                        or recorder.events == end_at):
+            break
+        t = engine.t
+        if t is not None and t.frame >= 2 and not t.hard_drop:
+            for action in bot.plan(engine):
+                engine.apply(action)
+            engine.apply(Action.HARD_DROP)
+        engine.tick()
+    recorder.close(engine.clock.frame, engine.points, engine.lines_cleared)
+    return engine
+
+
+def test_round_trip_across_chunks(tmp_path):
+    path = tmp_path / 'game.rpl'
+    engine = record(path, 4, 150)
+    _, events = read_replay(path)
+    assert len(events) > 3 * CHUNK_EVENTS
+    player = ReplayPlayer(str(path))
+    assert player.run()
+    assert player.engine.points == engine.points
+    assert player.final == (engine.points, engine.lines_cleared)
+
+
+def test_end_as_the_last_event_of_a_chunk(tmp_path):
+    path = tmp_path / 'game.rpl'
+    engine = record(path, 6, 60, end_at=CHUNK_EVENTS - 1)
+    _, events = read_replay(path)
+    assert len(events) % CHUNK_EVENTS == 0
+    assert events[-1] == (engine.clock.frame, END,
+                          (engine.points, engine.lines_cleared))
+    assert ReplayPlayer(str(path)).run()
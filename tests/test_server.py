@@ -0,0 +1,46 @@
+from engine import Action
+from server import Session, decode_delta
+from varint import read_varint
+
+
+class Writer():
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+def messages(data):
+    """Split a server stream after its header into message payloads."""
+    pos = 5
+    _, pos = read_varint(data, pos)
+    payloads = []
+    while pos < len(data):
+        length, pos = read_varint(data, pos)
+        payloads.append(bytes(data[pos:pos + length]))
+        pos += length
+    return payloads
+
+
+def test_action_before_first_tick_is_applied():
+    writer = Writer()
+    session = Session(0, writer)
+    assert session.engine.t is not None
+    x = session.engine.t.x
+
+    session.apply(bytes([Action.MOVE_LEFT]))
+    assert session.engine.t.x == x - 1
+
+    session.tick(1)
+    delta = decode_delta(messages(writer.data)[-1])
+    assert delta['piece'][2] == x - 1
+
+
+def test_first_tick_keeps_the_spawned_piece():
+    session = Session(0, Writer())
+    t = session.engine.t
+    session.tick(1)
+    assert session.engine.t is t
+    assert session.engine.pieces == 0
@@ -0,0 +1,46 @@
+from bot import Bot
+from engine import Engine
+from snapshot import UndoStack
+
+
+def play(engine, pieces):
+    bot = Bot(depth=1)
+    for _ in range(pieces):
+        bot.play_piece(engine)
+
+
+def test_clone_late_in_a_game_deals_the_same_pieces():
+    engine = Engine(seed=3)
+    play(engine, 300)
+    clone = engine.clone()
+    assert clone.preview(20) == engine.preview(20)
+    assert [clone.bag.next() for _ in range(50)] == \
+        [engine.bag.next() for _ in range(50)]
+
+
+def test_clone_plays_on_like_the_original():
+    engine = Engine(seed=5)
+    play(engine, 100)
+    clone = engine.clone()
+    play(engine, 50)
+    play(clone, 50)
+    assert clone.snapshot() == engine.snapshot()
+
+
+def test_restore_after_drawing_more_bags():
+    engine = Engine(seed=7)
+    play(engine, 20)
+    snapshot = engine.snapshot()
+    coming = engine.preview(30)
+    play(engine, 40)
+    engine.restore(snapshot)
+    assert engine.snapshot() == snapshot
+    assert engine.preview(30) == coming
+
+
+def test_undo_stack_is_bounded():
+    stack = UndoStack(limit=2)
+    engine = Engine(seed=0)
+    for _ in range(3):
+        stack.push(engine.snapshot())
+    assert len(stack) == 2
@@ -0,0 +1,16 @@
+import sys
+
+from sound_bank import SoundBank, sound_bank
+
+
+def test_shared_bank_is_disabled_without_a_window():
+    assert not sound_bank.enabled
+
+
+def test_disabled_bank_never_loads_audio(monkeypatch):
+    # Loading a sound would import Arcade, so make that import fail
+    monkeypatch.setitem(sys.modules, 'arcade', None)
+    bank = SoundBank(enabled=False)
+    bank.preload()
+    bank.play('move')
+    assert bank.sounds == {}
@@ -0,0 +1,73 @@
+import pytest
+
+from grid import Grid
+from shape import Shape
+from tetrimino import Tetrimino
+
+
+class CountingTetrimino(Tetrimino):
+    """Counts touch downs the way ArcadeTetrimino plays their sound."""
+
+    def __init__(self, *args):
+        self.touchdowns = 0
+        super().__init__(*args)
+
+    def move_down(self):
+        touched_down = self.lock_down_timer is not None
+        moved = super().move_down()
+        if not moved and not touched_down:
+            self.touchdowns += 1
+        return moved
+
+
+@pytest.mark.parametrize('level', [1, 15, 20, 115, 116, 575])
+def test_gravity_only_moves_down(level):
+    t = Tetrimino(Shape.T, Grid(), level)
+    y = t.y
+    for _ in range(200):
+        if t.grid.refreshed and t.lock_down_timer is None and t.frame:
+            break
+        t.on_tick()
+        # The lowest cell never sinks into the floor
+        assert t.y + t.state.bbox[1] >= 1
+        assert t.y <= y
+        y = t.y
+
+
+@pytest.mark.parametrize('level', [20, 116, 575])
+def test_high_gravity_lands_in_one_tick(level):
+    t = Tetrimino(Shape.T, Grid(), level)
+    t.on_tick()
+    assert t.drop_distance() == 0
+    assert t.lock_down_timer is not None
+
+
+def test_fall_ignores_no_rows():
+    t = Tetrimino(Shape.T, Grid(), 1)
+    y = t.y
+    assert not t.fall(0)
+    assert not t.fall(-3)
+    assert t.y == y
+
+
+@pytest.mark.parametrize('level', [1, 20])
+def test_lock_tick_skips_gravity(level):
+    grid = Grid()
+    grid.refreshed = False
+    t = CountingTetrimino(Shape.T, grid, level)
+    while not grid.refreshed:
+        t.on_tick()
+    # The lock ran on the last tick, without touching down again
+    assert t.touchdowns == 1
+    assert t.lock_down_timer is None
+
+
+def test_hard_drop_lock_tick_skips_gravity():
+    grid = Grid()
+    grid.refreshed = False
+    t = CountingTetrimino(Shape.T, grid, 20)
+    t.start_hard_drop()
+    t.on_tick()
+    assert grid.refreshed
+    assert t.touchdowns == 1
+    assert t.lock_down_timer is None
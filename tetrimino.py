@@ -1,9 +1,16 @@
-import arcade
-from datetime import datetime
-
 from shape import Shape
+from clock import ms_to_ticks
+from events import EventType
+
+# Time a tetrimino rests on the surface before it locks down
+LOCK_DELAY = ms_to_ticks(500)
 
-from constants import SIDE_MARGIN, BOTTOM_MARGIN, COLORS, BLACK
+# Highest level the fall speed formula is meaningful for. Later levels fall
+# at its speed.
+MAX_LEVEL = 20
+
+# Fastest gravity in rows per tick, enough to cross the Matrix at once
+MAX_GRAVITY = 20
 
 
 class Tetrimino():
@@ -11,20 +18,13 @@ class Tetrimino():
     def __init__(self, shape, grid, level):
         """Initialize the tetrimino."""
 
-        # Initialize Sounds
-        self.fall_sound = arcade.load_sound('sounds/PieceFall.ogg')
-        self.move_sound = arcade.load_sound('sounds/PieceMoveLR.ogg')
-        self.rotate_sound = arcade.load_sound('sounds/PieceRotateLR.ogg')
-        self.rotate_fail = arcade.load_sound('sounds/PieceRotateFail.ogg')
-        self.lockdown_sound = arcade.load_sound('sounds/PieceLockdown.ogg')
-        self.touchdown_sound = arcade.load_sound('sounds/PieceTouchDown.ogg')
-        self.hard_drop_sound = arcade.load_sound('sounds/PieceHardDrop.ogg')
-
         # Initialize tetrimino values
-        self.shape = shape.value[0]
-        self.color = shape.value[1]
+        self.shape = shape
+        self.rotation = 0
+        self.color = shape.color
         self._grid = grid._grid
         self.grid = grid
+        self.events = grid.events
         self.level = level
 
         self.down_pressed = False
@@ -35,9 +35,12 @@ class Tetrimino():
         self.soft_drop_start = 0
         self.soft_drop_lock = 0
 
-        # Timers
-        self.move_down_timer = datetime.now()
+        # Timers, counted in simulation ticks since the tetrimino spawned
+        self.frame = 0
         self.lock_down_timer = None
+        # Rows of gravity owed to the tetrimino, a fraction of a row below
+        # 1G and several rows at higher speeds
+        self.gravity = 0.0
 
         # Initial Position
         self.x = 4
@@ -49,108 +52,182 @@ class Tetrimino():
         self.locked_out = False
         self.blocked_out = self.is_blocked_out()
 
-    def on_key_press(self, symbol: int, modifiers: int):
-        """Handle user keyboard input.
+    # Attributes copied by snapshot(), after the shape
+    SNAPSHOT_FIELDS = ('rotation', 'x', 'y', 'level', 'down_pressed',
+                       'hard_drop', 'hard_drop_start', 'hard_drop_lock',
+                       'soft_drop_start', 'soft_drop_lock', 'frame',
+                       'gravity', 'lock_down_timer', 'locked_out',
+                       'blocked_out')
 
-        Left Arrow: Move Left
-        Right Arrow: Move Right
-        Up: Rotate Clockwise
-        X: Rotate Clockwise
-        Z: Rotate Counter-Clockwise
-        L-CTRL: Rotate Counter-Clockwise
+    def snapshot(self):
+        """Copy the state of the tetrimino into a tuple.
 
-        Arguments:
-            symbol {int} -- Which key was pressed
-            modifiers {int} -- Which modifiers were pressed
+        Returns:
+            tuple -- The shape followed by every field in SNAPSHOT_FIELDS
         """
-        if symbol == arcade.key.DOWN:
-            self.down_pressed = True
-            self.soft_drop_start = self.y
-        elif symbol == arcade.key.UP:
-            self.rotate_clockwise()
-        elif symbol == arcade.key.X:
-            self.rotate_clockwise()
-        elif symbol == arcade.key.LCTRL:
-            self.rotate_counter_clockwise()
-        elif symbol == arcade.key.Z:
-            self.rotate_counter_clockwise()
-
-    def on_key_release(self, symbol: int, modifiers: int):
-        """Undo movement vectors when movement keys are released.
+        return (self.shape,) + tuple(getattr(self, field)
+                                     for field in self.SNAPSHOT_FIELDS)
 
-        Arguments:
-            symbol {int} -- Which key was pressed
-            modifiers {int} -- Which modifiers were pressed
+    def restore(self, snapshot):
+        """Put the tetrimino back to a snapshot taken by snapshot()."""
+        for field, value in zip(self.SNAPSHOT_FIELDS, snapshot[1:]):
+            setattr(self, field, value)
+
+    def start_soft_drop(self):
+        """Start moving the tetrimino down on every update."""
+        self.down_pressed = True
+        self.soft_drop_start = self.y
+
+    def stop_soft_drop(self):
+        """Return the tetrimino to its normal fall speed."""
+        self.down_pressed = False
+        self.soft_drop_start = 0
+
+    def start_hard_drop(self):
+        """Drop the tetrimino straight onto the surface.
+
+        The piece moves the whole way at once and locks down on the next
+        tick, without waiting for the lock delay.
         """
-        if symbol == arcade.key.LEFT:
-            if not self.hard_drop:
-                self.move_left()
-        elif symbol == arcade.key.RIGHT:
-            if not self.hard_drop:
-                self.move_right()
-        elif symbol == arcade.key.DOWN:
-            self.down_pressed = False
-            self.soft_drop_start = 0
-        elif symbol == arcade.key.SPACE:
-            self.hard_drop = True
-            arcade.play_sound(self.hard_drop_sound)
-            self.hard_drop_start = self.y
+        if self.hard_drop:
+            return
+        self.hard_drop = True
+        self.hard_drop_start = self.y
+        self.y -= self.drop_distance()
+        self.move_down()
+        self.hard_drop_lock = self.hard_drop_start - self.y
+
+    def drop_distance(self):
+        """Rows the tetrimino can fall before it rests on the surface."""
+        return self.grid.drop_distance(self.state, self.x, self.y)
 
     def speed(self, level):
         """Calculate fall speed of the tetrimino.
 
+        Levels past MAX_LEVEL fall at its speed.
+
         Arguments:
             level {int} -- The current level
 
         Returns:
             float -- The time in ms between each block movement
         """
-        n = level - 1
+        n = min(level, MAX_LEVEL) - 1
         return 1000 * (0.8 - (n * 0.007)) ** n
 
     def move_left(self):
-        """Move X coordinate of tetrimino location to the left."""
+        """Move X coordinate of tetrimino location to the left.
+
+        Returns:
+            bool -- True if the tetrimino moved. False, otherwise.
+        """
         new_x, new_y = self.x - 1, self.y
         if not self.is_collision_on_move(new_x, new_y):
             self.x, self.y = new_x, new_y
-            arcade.play_sound(self.move_sound)
+            if self.events:
+                self.events.emit(EventType.MOVE, self.x, self.y)
+            return True
+        return False
 
     def move_right(self):
-        """Move X coordinate of tetrimino location to the right."""
+        """Move X coordinate of tetrimino location to the right.
+
+        Returns:
+            bool -- True if the tetrimino moved. False, otherwise.
+        """
         new_x, new_y = self.x + 1, self.y
         if not self.is_collision_on_move(new_x, new_y):
             self.x, self.y = new_x, new_y
-            arcade.play_sound(self.move_sound)
+            if self.events:
+                self.events.emit(EventType.MOVE, self.x, self.y)
+            return True
+        return False
 
     def move_down(self):
-        """Move Y coordinate of tetrimino location down."""
+        """Move Y coordinate of tetrimino location down.
+
+        Starts the lock down timer when the tetrimino touches down.
+
+        Returns:
+            bool -- True if the tetrimino moved. False, otherwise.
+        """
         new_x, new_y = self.x, self.y - 1
         if not self.is_collision_on_move(new_x, new_y):
             self.x, self.y = new_x, new_y
-            arcade.play_sound(self.fall_sound)
-        elif not self.lock_down_timer:
-            self.lock_down_timer = datetime.now()
+            return True
+        if self.lock_down_timer is None:
+            self.lock_down_timer = self.frame
             self.soft_drop_lock = self.soft_drop_start - self.y
             self.hard_drop_lock = self.hard_drop_start - self.y
-            arcade.play_sound(self.touchdown_sound)
+        return False
+
+    def fall(self, rows):
+        """Move the tetrimino down by gravity.
+
+        A single row is an ordinary move down. Several rows in one tick are
+        resolved at once from the distance to the surface, so 20G costs no
+        more than 1G.
+
+        Arguments:
+            rows {int} -- Rows of gravity due this tick
+
+        Returns:
+            bool -- True if the tetrimino moved. False, otherwise.
+        """
+        if rows <= 0:
+            return False
+        if rows == 1:
+            return self.move_down()
+        distance = self.drop_distance()
+        if rows <= distance:
+            self.y -= rows
+            return True
+        self.y -= distance
+        # Touch down on the surface
+        self.move_down()
+        return distance > 0
 
     def rotate_clockwise(self):
-        """Rotate the tetrimino clockwise."""
-        shape_attempt = list(zip(*reversed(self.shape)))
-        if not self.is_collision_on_rotate(shape_attempt):
-            self.shape = shape_attempt
-            arcade.play_sound(self.rotate_sound)
-        else:
-            arcade.play_sound(self.rotate_fail)
+        """Rotate the tetrimino clockwise.
+
+        Returns:
+            bool -- True if the tetrimino rotated. False, otherwise.
+        """
+        return self.rotate((self.rotation + 1) % 4)
 
     def rotate_counter_clockwise(self):
-        """Rotate the tetrimino counter-clockwise."""
-        shape_attempt = list(reversed(list(zip(*self.shape))))
-        if not self.is_collision_on_rotate(shape_attempt):
-            self.shape = shape_attempt
-            arcade.play_sound(self.rotate_sound)
-        else:
-            arcade.play_sound(self.rotate_fail)
+        """Rotate the tetrimino counter-clockwise.
+
+        Returns:
+            bool -- True if the tetrimino rotated. False, otherwise.
+        """
+        return self.rotate((self.rotation - 1) % 4)
+
+    def rotate(self, rotation):
+        """Rotate the tetrimino to a new rotation state.
+
+        Arguments:
+            rotation {int} -- Index into the shape's rotation states
+
+        Returns:
+            bool -- True if the tetrimino rotated. False, otherwise.
+        """
+        if not self.is_collision_on_rotate(rotation):
+            self.rotation = rotation
+            if self.events:
+                self.events.emit(EventType.ROTATE, rotation)
+            return True
+        return False
+
+    @property
+    def state(self):
+        """The precomputed geometry of the current rotation."""
+        return self.shape.rotations[self.rotation]
+
+    @property
+    def key(self):
+        """Hashable (shape, rotation, x, y) state of the tetrimino."""
+        return (self.shape, self.rotation, self.x, self.y)
 
     def is_blocked_out(self):
         """Check if Tetrimino is colliding in current position.
@@ -169,79 +246,42 @@ class Tetrimino():
         Returns:
             bool -- True if a collision is detected. False, otherwise.
         """
-        for i, row in enumerate(reversed(self.shape)):
-            for j, column in enumerate(row):
-                matrix_value = self._grid[new_y + i][new_x + j]
-                col_sum = matrix_value + row[j]
-                if col_sum != self.color and col_sum != matrix_value:
-                    return True
-        return False
+        return self.grid.collides(self.state.masks, new_x, new_y)
 
-    def is_collision_on_rotate(self, new_shape):
-        """Check for collision with a proposed new shape.
+    def is_collision_on_rotate(self, new_rotation):
+        """Check for collision with a proposed new rotation.
 
         Arguments:
-            new_shape {[[]]} -- The proposed shape after rotation
+            new_rotation {int} -- The proposed rotation state
 
         Returns:
             bool -- True if a collision is detected. False, otherwise.
         """
-        for i, row in enumerate(reversed(new_shape)):
-            for j, column in enumerate(row):
-                matrix_value = self._grid[self.y + i][self.x + j]
-                col_sum = matrix_value + row[j]
-                if col_sum != self.color and col_sum != matrix_value:
-                    return True
-        return False
+        masks = self.shape.rotations[new_rotation].masks
+        return self.grid.collides(masks, self.x, self.y)
 
-    def on_update(self, delta_time: float):
-        """Update the position and status of the tetrimino.
+    def on_tick(self):
+        """Advance the position and status of the tetrimino by one tick."""
+        self.frame += 1
 
-        Arguments:
-            delta_time {float} -- Time since the last update
-        """
-        if self.down_pressed or self.hard_drop:
+        if self.down_pressed:
             self.move_down()
 
-        if self.lock_down_timer:
-            if self.time_delta_ms(self.lock_down_timer) >= 500:
+        if self.lock_down_timer is not None:
+            if (self.hard_drop
+                    or self.frame - self.lock_down_timer >= LOCK_DELAY):
                 self.lock_down()
                 self.lock_down_timer = None
+                # Locked, so no gravity and no second touch down
+                return
 
-        if self.time_delta_ms(self.move_down_timer) >= self.speed(self.level):
-            self.move_down()
-            self.move_down_timer = datetime.now()
-
-    def time_delta_ms(self, time):
-        """Get delta time between now and a given time.
-
-        Arguments:
-            time {float} -- Time to compare against current time
-
-        Returns:
-            float -- The delta time in milliseconds
-        """
-        return (datetime.now() - time).total_seconds() * 1000
-
-    def draw(self):
-        """Draw the tetrimino."""
-        for i, row in enumerate(reversed(self.shape)):
-            for j, block in enumerate(row):
-                if block > 1 and (self.y + i) < 21:
-                    x = SIDE_MARGIN + (j + self.x) * 24
-                    y = BOTTOM_MARGIN + (i + self.y) * 24
-                    arcade.draw_rectangle_filled(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=COLORS[self.color])
-                    arcade.draw_rectangle_outline(
-                        center_x=x,
-                        center_y=y,
-                        width=24,
-                        height=24,
-                        color=BLACK)
+        self.gravity += min(1 / ms_to_ticks(self.speed(self.level)),
+                            MAX_GRAVITY)
+        # Allow for rounding error so whole intervals give whole rows
+        rows = int(self.gravity + 1e-9)
+        if rows:
+            self.gravity -= rows
+            self.fall(rows)
 
     def lock_down(self):
         """Enter Lock Down phase where the Tetrimino locks to the grid.
@@ -250,18 +290,24 @@ class Tetrimino():
         Tetrimino status as locked out of the Matrix.
         """
         self.locked_out = False
-        for i, row in enumerate(reversed(self.shape)):
-            for j, block in enumerate(row):
-                y = self.y + i
-                x = self.x + j
-
-                if x != 0 and x != 11 and y != 0 and row[j] != 0:
-                    self._grid[y][x] = row[j]
-                    if y >= 21:
-                        self.locked_out = True
-
-        arcade.play_sound(self.lockdown_sound)
-        self.grid.refresh()
+        rows = set()
+        for dx, dy in self.state.cells:
+            y = self.y + dy
+            x = self.x + dx
+
+            if x != 0 and x != 11 and y != 0:
+                self.grid.fill(x, y, self.color)
+                rows.add(y)
+                if y >= 21:
+                    self.locked_out = True
+
+        if self.events:
+            # The drop counters go negative when no drop was started
+            self.events.emit(EventType.LOCK, self.shape, self.x, self.y,
+                             self.rotation, self.frame,
+                             max(self.hard_drop_lock, 0),
+                             max(self.soft_drop_lock, 0))
+        self.grid.refresh(rows)
 
     def __str__(self):
-        return '\n'.join([str(x) for x in self.shape])
+        return '\n'.join([str(x) for x in self.state.matrix])
@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+
+from bot import Bot
+from engine import Engine
+
+# Strategies that can enter a tournament, each built once per worker
+BOTS = {
+    'greedy': lambda: Bot(depth=1),
+    'lookahead': lambda: Bot(depth=2),
+    'deep': lambda: Bot(depth=3),
+}
+
+FIELDS = ['bot', 'seed', 'points', 'lines', 'level', 'pieces', 'topped_out',
+          'seconds', 'pieces_per_second']
+
+# Seconds between refreshes of the live summary
+SUMMARY_INTERVAL = 1.0
+
+# Bots built in each worker process
+_bots = {}
+
+
+def play_game(job):
+    """Play one game with a bot, until it tops out or reaches the limit.
+
+    Arguments:
+        job {(str, int, int)} -- Name of the bot in BOTS, seed of the bag and
+            the most pieces to play, or None for no limit
+
+    Returns:
+        dict -- The result, with a value for every name in FIELDS.
+            topped_out is False for a game stopped by the piece limit
+    """
+    name, seed, max_pieces = job
+    bot = _bots.get(name)
+    if bot is None:
+        bot = _bots[name] = BOTS[name]()
+
+    engine = Engine(seed=seed)
+    start = time.perf_counter()
+    bot.play(engine, max_pieces)
+    seconds = time.perf_counter() - start
+    return {
+        'bot': name,
+        'seed': seed,
+        'points': engine.points,
+        'lines': engine.lines_cleared,
+        'level': engine.level,
+        'pieces': engine.pieces,
+        'topped_out': engine.game_over,
+        'seconds': seconds,
+        'pieces_per_second': engine.pieces / seconds if seconds else 0.0,
+    }
+
+
+class Standings():
+
+    def __init__(self):
+        """Initialize the aggregated results of every bot."""
+        self.results = {}
+
+    def add(self, result):
+        self.results.setdefault(result['bot'], []).append(result)
+
+    def summary(self):
+        """Aggregate the results of each bot.
+
+        Returns:
+            {str: dict} -- Games played, games topped out, mean and median
+                points, mean lines, highest level, mean pieces and pieces per
+                second of each bot
+        """
+        summary = {}
+        for name, results in self.results.items():
+            points = [r['points'] for r in results]
+            seconds = sum(r['seconds'] for r in results)
+            pieces = sum(r['pieces'] for r in results)
+            summary[name] = {
+                'games': len(results),
+                'topped_out': sum(r['topped_out'] for r in results),
+                'mean_points': statistics.mean(points),
+                'median_points': statistics.median(points),
+                'mean_lines': statistics.mean(r['lines'] for r in results),
+                'max_level': max(r['level'] for r in results),
+                'mean_pieces': pieces / len(results),
+                'pieces_per_second': pieces / seconds if seconds else 0.0,
+            }
+        return summary
+
+    def lines(self):
+        """Format the summary as one line per bot."""
+        return [f'{name:<10} games {s["games"]:>6} '
+                f'(topped out {s["topped_out"]})  '
+                f'points {s["mean_points"]:>10.1f} '
+                f'(median {s["median_points"]:.0f})  '
+                f'lines {s["mean_lines"]:>7.1f}  level {s["max_level"]:>3}  '
+                f'pieces {s["mean_pieces"]:>7.1f}  '
+                f'{s["pieces_per_second"]:>8.1f} pieces/s'
+                for name, s in self.summary().items()]
+
+
+class ResultWriter():
+
+    def __init__(self, path):
+        """Stream results to a file as they arrive.
+
+        Arguments:
+            path {str} -- A .csv file, or JSON lines for any other extension
+        """
+        self.file = open(path, 'w', newline='')
+        self.csv = None
+        if path.endswith('.csv'):
+            self.csv = csv.DictWriter(self.file, FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.csv is not None:
+            self.csv.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run(bots, seeds, path=None, workers=None, max_pieces=None, live=True):
+    """Play every bot on every seed across a pool of processes.
+
+    Arguments:
+        bots {[str]} -- Names of the bots in BOTS
+        seeds {[int]} -- Seeds of the games each bot plays
+        path {str} -- Stream each result to this file
+        workers {int} -- Processes, one per core by default
+        max_pieces {int} -- Stop each game after this many pieces, if given
+        live {bool} -- Print a live summary to stderr
+
+    Returns:
+        Standings -- The results of every game
+    """
+    jobs = [(name, seed, max_pieces) for seed in seeds for name in bots]
+    workers = workers or os.cpu_count()
+    standings = Standings()
+    writer = ResultWriter(path) if path else None
+    shown = time.monotonic()
+    try:
+        with Pool(workers) as pool:
+            for done, result in enumerate(
+                    pool.imap_unordered(play_game, jobs), 1):
+                standings.add(result)
+                if writer is not None:
+                    writer.write(result)
+                now = time.monotonic()
+                if live and (now - shown >= SUMMARY_INTERVAL
+                             or done == len(jobs)):
+                    shown = now
+                    print(f'\n{done}/{len(jobs)} games', file=sys.stderr)
+                    print('\n'.join(standings.lines()), file=sys.stderr)
+    finally:
+        if writer is not None:
+            writer.close()
+    return standings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Play bots against each other over many seeds.')
+    parser.add_argument('--bots', nargs='+', choices=list(BOTS),
+                        default=['greedy'], help='Bots to enter')
+    parser.add_argument('--seeds', type=int, default=100,
+                        help='Games each bot plays, on seeds 0 to SEEDS - 1')
+    parser.add_argument('--first-seed', type=int, default=0,
+                        help='Seed of the first game')
+    parser.add_argument('--max-pieces', type=int,
+                        help='Stop each game after this many pieces, since '
+                             'the bots rarely top out')
+    parser.add_argument('--workers', type=int,
+                        help='Processes, one per core by default')
+    parser.add_argument('--output', '-o',
+                        help='Stream results to a .csv or JSON lines file')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Only print the final standings')
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    standings = run(args.bots, seeds, args.output, args.workers,
+                    args.max_pieces, live=not args.quiet)
+    if args.quiet:
+        print('\n'.join(standings.lines()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+def write_varint(buffer, value):
+    """Append an unsigned LEB128 varint to a bytearray.
+
+    Arguments:
+        buffer {bytearray} -- The buffer to append to
+        value {int} -- A non-negative integer
+    """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, pos):
+    """Read an unsigned LEB128 varint.
+
+    Arguments:
+        data {bytes} -- The encoded data
+        pos {int} -- Offset of the varint
+
+    Returns:
+        (int, int) -- The value and the offset after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7